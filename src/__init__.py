@@ -40,15 +40,20 @@ def exception_info():
 #
 import atexit
 import binascii
+import contextlib
+import functools
+import hashlib
 import io
 import math
 import os
 import re
+import struct
 import sys
 import typing
 import warnings
 import weakref
 import zipfile
+from array import array
 
 from . import extra
 
@@ -109,6 +114,10 @@ else:
 
 mupdf_version_tuple = (mupdf.FZ_VERSION_MAJOR, mupdf.FZ_VERSION_MINOR, mupdf.FZ_VERSION_PATCH)
 
+# Shared identity matrix for MuPDF calls that take a matrix by value. Must not
+# be modified or returned to callers.
+_FZ_IDENTITY = mupdf.FzMatrix()
+
 
 # Names required by class method typing annotations.
 OptBytes = typing.Optional[typing.ByteString]
@@ -298,7 +307,7 @@ class Annot:
                 insert_rot = 0
 
             if insert_rot:
-                mupdf.pdf_dict_put_int( annot_obj, PDF_NAME('Rotate'), rotate)
+                mupdf.pdf_dict_put_int( annot_obj, _N_ROTATE, rotate)
 
             mupdf.pdf_dirty_annot( annot)
             mupdf.pdf_update_annot( annot) # let MuPDF update
@@ -466,7 +475,7 @@ class Annot:
             mupdf.pdf_delete_annot(page, irt_annot)
         mupdf.pdf_dict_del(annot_obj, PDF_NAME('Popup'));
 
-        annots = mupdf.pdf_dict_get(page.obj(), PDF_NAME('Annots'))
+        annots = mupdf.pdf_dict_get(page.obj(), _N_ANNOTS)
         n = mupdf.pdf_array_len(annots)
         found = 0
         for i in range(n-1, -1, -1):
@@ -478,7 +487,7 @@ class Annot:
                 mupdf.pdf_array_delete(annots, i)
                 found = 1
         if found:
-            mupdf.pdf_dict_put(page.obj(), PDF_NAME('Annots'), annots)
+            mupdf.pdf_dict_put(page.obj(), _N_ANNOTS, annots)
 
     @property
     def file_info(self):
@@ -1069,7 +1078,7 @@ class Annot:
         if type == mupdf.PDF_ANNOT_FREE_TEXT and rot % 90 != 0:
             rot = 0
         annot_obj = mupdf.pdf_annot_obj(annot)
-        mupdf.pdf_dict_put_int(annot_obj, PDF_NAME('Rotate'), rot)
+        mupdf.pdf_dict_put_int(annot_obj, _N_ROTATE, rot)
 
     @property
     def type(self):
@@ -1402,7 +1411,7 @@ class Annot:
             mupdf.pdf_dict_put_text_string(fs, PDF_NAME('F'), filename)
             mupdf.pdf_dict_put_text_string(stream, PDF_NAME('UF'), filename)
             mupdf.pdf_dict_put_text_string(fs, PDF_NAME('UF'), filename)
-            mupdf.pdf_dict_put_text_string(annot_obj, PDF_NAME('Contents'), filename)
+            mupdf.pdf_dict_put_text_string(annot_obj, _N_CONTENTS, filename)
 
         if ufilename:
             mupdf.pdf_dict_put_text_string(stream, PDF_NAME('UF'), ufilename)
@@ -2329,9 +2338,9 @@ class DeviceWrapper:
             pm, clip = args
             bbox = JM_irect_from_py( clip)
             if mupdf.fz_is_infinite_irect( bbox):
-                self.this = mupdf.fz_new_draw_device( mupdf.FzMatrix(), pm)
+                self.this = mupdf.fz_new_draw_device( _FZ_IDENTITY, pm)
             else:
-                self.this = mupdf.fz_new_draw_device_with_bbox( mupdf.FzMatrix(), pm, bbox)
+                self.this = mupdf.fz_new_draw_device_with_bbox( _FZ_IDENTITY, pm, bbox)
         elif args_match( args, mupdf.FzDisplayList):
             dl, = args
             self.this = mupdf.fz_new_list_device( dl)
@@ -2467,6 +2476,7 @@ class Document:
         self.FontInfos   = []
         self.Graftmaps   = {}
         self.ShownPages  = {}
+        self.ShownXObjects  = {}
         self.InsertedImages  = {}
         self._page_refs  = weakref.WeakValueDictionary()
         if isinstance(filename, mupdf.PdfDocument):
@@ -3900,7 +3910,7 @@ class Document:
             page1 = mupdf.pdf_resolve_indirect( mupdf.pdf_lookup_page_obj( pdf, pno))
 
             page2 = mupdf.pdf_deep_copy_obj( page1)
-            old_annots = mupdf.pdf_dict_get( page2, PDF_NAME('Annots'))
+            old_annots = mupdf.pdf_dict_get( page2, _N_ANNOTS)
 
             # copy annotations, but remove Popup and IRT types
             if old_annots.m_internal:
@@ -3920,7 +3930,7 @@ class Document:
                     mupdf.pdf_dict_del( copy_o, PDF_NAME('Popup'))
                     mupdf.pdf_dict_del( copy_o, PDF_NAME('P'))
                     mupdf.pdf_array_push( new_annots, copy_o)
-                mupdf.pdf_dict_put( page2, PDF_NAME('Annots'), new_annots)
+                mupdf.pdf_dict_put( page2, _N_ANNOTS, new_annots)
 
             # copy the old contents stream(s)
             res = JM_read_contents( page1)
@@ -3930,7 +3940,7 @@ class Document:
                 #contents = mupdf.pdf_add_stream( pdf, mupdf.fz_new_buffer_from_copied_data( b"  ", 1), NULL, 0)
                 contents = mupdf.pdf_add_stream( pdf, mupdf.FzBuffer.fz_new_buffer_from_copied_data( b" "), mupdf.PdfObj(), 0)
                 JM_update_stream( pdf, contents, res, 1)
-                mupdf.pdf_dict_put( page2, PDF_NAME('Contents'), contents)
+                mupdf.pdf_dict_put( page2, _N_CONTENTS, contents)
 
             # now insert target page, making sure it is an indirect object
             xref = mupdf.pdf_create_object( pdf)   # get new xref
@@ -4602,7 +4612,6 @@ class Document:
 
         val.thisown = True
         self._page_refs[id(val)] = val
-        val._annot_refs = weakref.WeakValueDictionary()
         val.number = page_id
         return val
 
@@ -5559,13 +5568,7 @@ class Document:
         if xref != -1:
             mupdf.pdf_update_object(pdf, xref, new_obj)
         else:
-            n = mupdf.pdf_dict_len(new_obj)
-            for i in range(n):
-                mupdf.pdf_dict_put(
-                        obj,
-                        mupdf.pdf_dict_get_key(new_obj, i),
-                        mupdf.pdf_dict_get_val(new_obj, i),
-                        )
+            JM_dict_merge(obj, new_obj)
 
     def xref_stream(self, xref):
         """Get decompressed xref stream."""
@@ -5611,6 +5614,11 @@ class Document:
             raise ValueError("document closed")
         pdf = _as_pdf_document(self)
         ASSERT_PDF(pdf)
+        if g_use_extra:
+            xref = extra.xref_xml_metadata( pdf)
+            if xref < 0:
+                RAISEPY( MSG_BAD_PDFROOT, JM_Exc_FileDataError)
+            return xref
         root = mupdf.pdf_dict_get( mupdf.pdf_trailer( pdf), PDF_NAME('Root'))
         if not root.m_internal:
             RAISEPY( MSG_BAD_PDFROOT, JM_Exc_FileDataError)
@@ -5698,6 +5706,10 @@ class DocumentWriter:
         mupdf.fz_end_page( self.this)
 
 
+# Lower-cased font names selecting CJK ordering 0 in Font().
+_CJK_ORDERING0_NAMES = frozenset(("cjk", "china-t", "china-ts"))
+
+
 class Font:
 
     def __del__(self):
@@ -5731,7 +5743,7 @@ class Font:
             if "/" in fname_lower or "\\" in fname_lower or "." in fname_lower:
                 print("Warning: did you mean a fontfile?")
 
-            if fname_lower in ("cjk", "china-t", "china-ts"):
+            if fname_lower in _CJK_ORDERING0_NAMES:
                 ordering = 0
 
             elif fname_lower.startswith("china-s"):
@@ -5740,11 +5752,9 @@ class Font:
                 ordering = 3
             elif fname_lower.startswith("japan"):
                 ordering = 2
-            elif fname_lower in fitz_fontdescriptors.keys():
-                import pymupdf_fonts  # optional fonts
-                fontbuffer = pymupdf_fonts.myfont(fname_lower)  # make a copy
+            elif fname_lower in fitz_fontdescriptors:
+                fontbuffer = _pymupdf_fonts.myfont(fname_lower)  # make a copy
                 fontname = None  # ensure using fontbuffer only
-                del pymupdf_fonts  # remove package again
 
             elif ordering < 0:
                 fontname = Base14_fontdict.get(fontname, fontname)
@@ -5754,10 +5764,59 @@ class Font:
                    fontbuffer, script, lang, ordering,
                    is_bold, is_italic, is_serif, embed)
         self.this = font
+        # Glyph advances (font size 1) keyed by unicode. `_adv_cache` is used
+        # for default script/language/wmode/small_caps, `_adv_cache_ext` maps
+        # other combinations to their own dicts.
+        self._adv_cache = dict()
+        self._adv_cache_ext = dict()
+        self._lang_cache = dict()
 
     def __repr__(self):
         return "Font('%s')" % self.name
 
+    def _advance_cache(self, script, lang, wmode, small_caps):
+        '''
+        Returns dict mapping unicode to glyph advance for the given settings.
+        '''
+        if not (script or lang or wmode or small_caps):
+            return self._adv_cache
+        key = (script, lang, wmode, small_caps)
+        cache = self._adv_cache_ext.get(key)
+        if cache is None:
+            cache = self._adv_cache_ext[key] = dict()
+        return cache
+
+    def _fill_advance_cache(self, cache, unicodes, script, lang, wmode, small_caps):
+        '''
+        Adds glyph advances of all `unicodes` to `cache`.
+        '''
+        if g_use_extra:
+            unicodes = array('I', unicodes)
+            cache.update(zip(unicodes, extra.Font_advances(self.this, unicodes, script, lang, wmode, small_caps)))
+            return
+        for c in unicodes:
+            cache[c] = self._glyph_advance(c, script, lang, wmode, small_caps)
+
+    def _language(self, language):
+        '''
+        Returns cached result of mupdf.fz_text_language_from_string(language).
+        '''
+        lang = self._lang_cache.get(language)
+        if lang is None:
+            lang = self._lang_cache[language] = mupdf.fz_text_language_from_string(language)
+        return lang
+
+    def _glyph_advance(self, c, script, lang, wmode, small_caps):
+        '''
+        Returns uncached glyph advance of unicode `c` (font size 1).
+        '''
+        if small_caps:
+            font = self.this
+            gid = mupdf.fz_encode_character_sc(font, c)
+        else:
+            gid, font = mupdf.fz_encode_character_with_fallback(self.this, c, script, lang)
+        return mupdf.fz_advance_glyph(font, gid, wmode)
+
     def _valid_unicodes(self, arr):
         # fixme
         assert 0, 'Not implemented because implementation requires FT_Get_First_Char() etc.'
@@ -5766,7 +5825,7 @@ class Font:
         ptr = temp
         JM_valid_chars(font, ptr)
 
-    @property
+    @functools.cached_property
     def ascender(self):
         """Return the glyph ascender value."""
         return mupdf.fz_font_ascender(self.this)
@@ -5778,26 +5837,21 @@ class Font:
 
     def char_lengths(self, text, fontsize=11, language=None, script=0, wmode=0, small_caps=0):
         """Return tuple of char lengths of unicode 'text' under a fontsize."""
-        lang = mupdf.fz_text_language_from_string(language)
-        rc = []
-        for ch in text:
-            c = ord(ch)
-            if small_caps:
-                gid = mupdf.fz_encode_character_sc(thisfont, c)
-                if gid >= 0:
-                    font = self.this
-            else:
-                gid, font = mupdf.fz_encode_character_with_fallback(self.this, c, script, lang)
-            rc.append(fontsize * mupdf.fz_advance_glyph(font, gid, wmode))
-        return rc
-
-    @property
+        lang = self._language(language)
+        cache = self._advance_cache(script, lang, wmode, small_caps)
+        cps = list(map(ord, text))
+        missing = set(cps).difference(cache)
+        if missing:
+            self._fill_advance_cache(cache, missing, script, lang, wmode, small_caps)
+        return [fontsize * a for a in map(cache.__getitem__, cps)]
+
+    @functools.cached_property
     def descender(self):
         """Return the glyph descender value."""
         return mupdf.fz_font_descender(self.this)
 
-    @property
-    def flags(self):
+    @functools.cached_property
+    def _flags(self):
         f = mupdf.ll_fz_font_flags(self.this.m_internal)
         if not f:
             return
@@ -5837,30 +5891,34 @@ class Font:
                 'never-embed':  never_embed if mupdf_cppyy else f.never_embed,
                 }
 
+    @property
+    def flags(self):
+        f = self._flags
+        if f is None:
+            return
+        return dict(f)
+
     def glyph_advance(self, chr_, language=None, script=0, wmode=0, small_caps=0):
         """Return the glyph width of a unicode (font size 1)."""
-        lang = mupdf.fz_text_language_from_string(language)
-        if small_caps:
-            gid = mupdf.fz_encode_character_sc(thisfont, chr_)
-            if gid >= 0:
-                font = self.this
-        else:
-            gid, font = mupdf.fz_encode_character_with_fallback(self.this, chr_, script, lang)
-        return mupdf.fz_advance_glyph(font, gid, wmode)
+        lang = self._language(language)
+        cache = self._advance_cache(script, lang, wmode, small_caps)
+        a = cache.get(chr_)
+        if a is None:
+            a = cache[chr_] = self._glyph_advance(chr_, script, lang, wmode, small_caps)
+        return a
 
 
     def glyph_bbox(self, char, language=None, script=0, small_caps=0):
         """Return the glyph bbox of a unicode (font size 1)."""
-        lang = mupdf.fz_text_language_from_string(language)
+        lang = self._language(language)
         if small_caps:
-            gid = mupdf.fz_encode_character_sc( thisfont, char)
-            if gid >= 0:
-                font = self.this
+            font = self.this
+            gid = mupdf.fz_encode_character_sc( font, char)
         else:
             gid, font = mupdf.fz_encode_character_with_fallback( self.this, char, script, lang)
-        return Rect(mupdf.fz_bound_glyph( font, gid, mupdf.FzMatrix()))
+        return Rect(mupdf.fz_bound_glyph( font, gid, _FZ_IDENTITY))
 
-    @property
+    @functools.cached_property
     def glyph_count(self):
         return self.this.m_internal.glyph_count
 
@@ -5868,35 +5926,35 @@ class Font:
         """Return the unicode for a glyph name."""
         return glyph_name_to_unicode(name)
 
-    def has_glyph(self, chr, language=None, script=0, fallback=0):
+    def has_glyph(self, chr, language=None, script=0, fallback=0, small_caps=0):
         """Check whether font has a glyph for this unicode."""
         if fallback:
-            lang = mupdf.fz_text_language_from_string(language)
+            lang = self._language(language)
             gid, font = mupdf.fz_encode_character_with_fallback(self.this, chr, script, lang)
         else:
             if small_caps:
-                gid = mupdf.fz_encode_character_sc(thisfont, chr)
+                gid = mupdf.fz_encode_character_sc(self.this, chr)
             else:
-                gid = mupdf.fz_encode_character(thisfont, chr)
+                gid = mupdf.fz_encode_character(self.this, chr)
         return gid
 
-    @property
+    @functools.cached_property
     def is_bold(self):
         return mupdf.fz_font_is_bold( self.this)
 
-    @property
+    @functools.cached_property
     def is_italic(self):
         return mupdf.fz_font_is_italic( self.this)
 
-    @property
+    @functools.cached_property
     def is_monospaced(self):
         return mupdf.fz_font_is_monospaced( self.this)
 
-    @property
+    @functools.cached_property
     def is_serif(self):
         return mupdf.fz_font_is_serif( self.this)
 
-    @property
+    @functools.cached_property
     def is_writable(self):
         return True # see pymupdf commit ef4056ee4da2
         font = self.this
@@ -5915,7 +5973,7 @@ class Font:
             return False
         return True
 
-    @property
+    @functools.cached_property
     def name(self):
         ret = mupdf.fz_font_name(self.this)
         #log( '{ret=}')
@@ -5923,21 +5981,17 @@ class Font:
 
     def text_length(self, text, fontsize=11, language=None, script=0, wmode=0, small_caps=0):
         """Return length of unicode 'text' under a fontsize."""
-        thisfont = self.this
-        lang = mupdf.fz_text_language_from_string(language)
-        rc = 0
         if not isinstance(text, str):
             raise TypeError( MSG_BAD_TEXT)
-        len_ = len(text)
-        for ch in text:
-            c = ord(ch)
-            if small_caps:
-                gid = mupdf.fz_encode_character_sc(thisfont, c)
-                if gid >= 0:
-                    font = thisfont
-            else:
-                gid, font = mupdf.fz_encode_character_with_fallback(thisfont, c, script, lang)
-            rc += mupdf.fz_advance_glyph(font, gid, wmode)
+        lang = self._language(language)
+        cache = self._advance_cache(script, lang, wmode, small_caps)
+        cps = list(map(ord, text))
+        # Only unicodes not seen before need a call into MuPDF; the sum
+        # itself is then a single C-level gather and reduce.
+        missing = set(cps).difference(cache)
+        if missing:
+            self._fill_advance_cache(cache, missing, script, lang, wmode, small_caps)
+        rc = sum(map(cache.__getitem__, cps))
         rc *= fontsize
         return rc
 
@@ -6037,20 +6091,20 @@ class Link:
         """Create link destination details."""
         if hasattr(self, "parent") and self.parent is None:
             raise ValueError("orphaned object: parent is None")
-        if self.parent.parent.is_closed or self.parent.parent.isEncrypted:
-            raise ValueError("document closed or encrypted")
         doc = self.parent.parent
+        if doc.is_closed or doc.isEncrypted:
+            raise ValueError("document closed or encrypted")
 
-        if self.is_external or self.uri.startswith("#"):
+        uri = self.uri
+        if self.is_external or uri.startswith("#"):
             uri = None
         else:
-            uri = doc.resolve_link(self.uri)
+            uri = doc.resolve_link(uri)
 
         return linkDest(self, uri)
 
     @property
     def flags(self)->int:
-        CheckParent(self)
         doc = self.parent.parent
         if not doc.is_pdf:
             return 0
@@ -6062,37 +6116,47 @@ class Link:
     @property
     def is_external(self):
         """Flag the link as external."""
-        CheckParent(self)
         if g_use_extra:
             return extra.Link_is_external( self.this)
-        this_link = self.this
-        if not this_link.m_internal or not this_link.m_internal.uri:
+        m = self.this.m_internal
+        if not m or not m.uri:
             return False
-        return bool( mupdf.fz_is_external_link( this_link.m_internal.uri))
+        return bool( mupdf.fz_is_external_link( m.uri))
 
     @property
     def next(self):
         """Next link."""
-        if not self.this.m_internal:
+        this = self.this
+        if not this.m_internal:
             return None
-        CheckParent(self)
         if 0 and g_use_extra:
-            val = extra.Link_next( self.this)
+            val = extra.Link_next( this)
         else:
-            val = self.this.next()
+            val = this.next()
         if not val.m_internal:
             return None
         val = Link( val)
         if val:
+            page = self.parent
+            xref = self.xref
             val.thisown = True
-            val.parent = self.parent  # copy owning page from prev link
-            val.parent._annot_refs[id(val)] = val
-            if self.xref > 0:  # prev link has an xref
-                link_xrefs = [x[0] for x in self.parent.annot_xrefs() if x[1] == mupdf.PDF_ANNOT_LINK]
-                link_ids = [x[2] for x in self.parent.annot_xrefs() if x[1] == mupdf.PDF_ANNOT_LINK]
-                idx = link_xrefs.index(self.xref)
-                val.xref = link_xrefs[idx + 1]
-                val.id = link_ids[idx + 1]
+            val.parent = page  # copy owning page from prev link
+            page._annot_refs[id(val)] = val
+            if xref > 0:  # prev link has an xref
+                # Find the link following ours in a single pass.
+                found = False
+                for x in page.annot_xrefs():
+                    if x[1] != mupdf.PDF_ANNOT_LINK:
+                        continue
+                    if found:
+                        val.xref = x[0]
+                        val.id = x[2]
+                        break
+                    found = x[0] == xref
+                else:
+                    if found:
+                        raise IndexError("no link after xref %i" % xref)
+                    raise ValueError("link xref %i not on page" % xref)
             else:
                 val.xref = 0
                 val.id = ""
@@ -6101,14 +6165,12 @@ class Link:
     @property
     def rect(self):
         """Rectangle ('hot area')."""
-        CheckParent(self)
         # utils.py:getLinkDict() appears to expect exceptions from us, so we
         # ensure that we raise on error.
-        if not self.this or not self.this.m_internal:
+        this = self.this
+        if not this or not this.m_internal:
             raise Exception( 'self.this.m_internal not available')
-        assert self.this
-        assert self.this.m_internal
-        val = JM_py_from_rect( self.this.rect())
+        val = JM_py_from_rect( this.rect())
         val = Rect(val)
         return val
 
@@ -6133,12 +6195,13 @@ class Link:
         if hasattr(stroke, "__float__"):
             stroke = [float(stroke)]
         CheckColor(stroke)
-        if len(stroke) == 1:
-            s = "[%g]" % stroke[0]
-        elif len(stroke) == 3:
-            s = "[%g %g %g]" % tuple(stroke)
+        n = len(stroke)
+        if n == 1:
+            s = f"[{stroke[0]:g}]"
+        elif n == 3:
+            s = f"[{stroke[0]:g} {stroke[1]:g} {stroke[2]:g}]"
         else:
-            s = "[%g %g %g %g]" % tuple(stroke)
+            s = f"[{stroke[0]:g} {stroke[1]:g} {stroke[2]:g} {stroke[3]:g}]"
         doc.xref_set_key(self.xref, "C", s)
 
     def set_flags(self, flags):
@@ -6153,13 +6216,12 @@ class Link:
     @property
     def uri(self):
         """Uri string."""
-        CheckParent(self)
-        this_link = self.this
-        if 1:
-            return this_link.m_internal.uri if this_link.m_internal else ''
-        return this_link.uri() if this_link.m_internal else ''
+        m = self.this.m_internal
+        return m.uri if m else ''
 
     page = -1
+    # '__weakref__' because Page._annot_refs is a WeakValueDictionary.
+    __slots__ = ('this', 'parent', 'thisown', 'xref', 'id', '__weakref__')
 
 
 class Matrix:
@@ -6177,7 +6239,7 @@ class Matrix:
                           self.d + m[3], self.e + m[4], self.f + m[5])
 
     def __bool__(self):
-        return not (max(self) == min(self) == 0)
+        return not (self.a == self.b == self.c == self.d == self.e == self.f == 0)
 
     def __eq__(self, mat):
         if not hasattr(mat, "__len__"):
@@ -6185,6 +6247,14 @@ class Matrix:
         return len(mat) == 6 and bool(self - mat) is False
 
     def __getitem__(self, i):
+        if type(i) is int:
+            if   i == 0: return self.a
+            elif i == 1: return self.b
+            elif i == 2: return self.c
+            elif i == 3: return self.d
+            elif i == 4: return self.e
+            elif i == 5: return self.f
+        # Negative indexes, slices, other types and out of range.
         return (self.a, self.b, self.c, self.d, self.e, self.f)[i]
 
     def __init__(self, *args):
@@ -6197,36 +6267,33 @@ class Matrix:
         Matrix(Matrix) - new copy
         Matrix(sequence) - from 'sequence'
         """
-        if not args:
-            self.a = self.b = self.c = self.d = self.e = self.f = 0.0
-            return None
-        if len(args) > 6:
-            raise ValueError("Matrix: bad seq len")
-        if len(args) == 6:  # 6 numbers
+        nargs = len(args)
+        if nargs == 6:  # 6 numbers, the most frequent case
             self.a, self.b, self.c, self.d, self.e, self.f = map(float, args)
-            return None
-        if len(args) == 1:  # either an angle or a sequ
-            if hasattr(args[0], "__float__"):
-                theta = math.radians(args[0])
+        elif nargs == 1:  # either an angle or a sequ
+            arg = args[0]
+            if hasattr(arg, "__float__"):
+                theta = math.radians(arg)
                 c = round(math.cos(theta), 8)
                 s = round(math.sin(theta), 8)
                 self.a = self.d = c
                 self.b = s
                 self.c = -s
                 self.e = self.f = 0.0
-                return None
             else:
-                self.a, self.b, self.c, self.d, self.e, self.f = map(float, args[0])
-                return None
-        if len(args) == 2 or len(args) == 3 and args[2] == 0:
+                self.a, self.b, self.c, self.d, self.e, self.f = map(float, arg)
+        elif not nargs:
+            self.a = self.b = self.c = self.d = self.e = self.f = 0.0
+        elif nargs == 2 or nargs == 3 and args[2] == 0:
             self.a, self.b, self.c, self.d, self.e, self.f = float(args[0]), \
                 0.0, 0.0, float(args[1]), 0.0, 0.0
-            return None
-        if len(args) == 3 and args[2] == 1:
+        elif nargs == 3 and args[2] == 1:
             self.a, self.b, self.c, self.d, self.e, self.f = 1.0, \
                 float(args[1]), float(args[0]), 1.0, 0.0, 0.0
-            return None
-        raise ValueError("Matrix: bad args")
+        elif nargs > 6:
+            raise ValueError("Matrix: bad seq len")
+        else:
+            raise ValueError("Matrix: bad args")
 
     def __invert__(self):
         """Calculate inverted matrix."""
@@ -6240,14 +6307,14 @@ class Matrix:
         if hasattr(m, "__float__"):
             return Matrix(self.a * m, self.b * m, self.c * m,
                           self.d * m, self.e * m, self.f * m)
-        m1 = Matrix(1,1)
+        m1 = Matrix.__new__(Matrix)   # concat() sets all components
         return m1.concat(self, m)
 
     def __neg__(self):
         return Matrix(-self.a, -self.b, -self.c, -self.d, -self.e, -self.f)
 
     def __nonzero__(self):
-        return not (max(self) == min(self) == 0)
+        return not (self.a == self.b == self.c == self.d == self.e == self.f == 0)
 
     def __pos__(self):
         return Matrix(self)
@@ -6283,13 +6350,29 @@ class Matrix:
         m1 = util_invert_matrix(m)[1]
         if not m1:
             raise ZeroDivisionError("matrix not invertible")
-        m2 = Matrix(1,1)
+        m2 = Matrix.__new__(Matrix)   # concat() sets all components
         return m2.concat(self, m1)
     def concat(self, one, two):
         """Multiply two matrices and replace current one."""
-        if not len(one) == len(two) == 6:
+        if isinstance(one, Matrix):
+            a0, b0, c0, d0, e0, f0 = one.a, one.b, one.c, one.d, one.e, one.f
+        elif len(one) == 6:
+            a0, b0, c0, d0, e0, f0 = map(float, one)
+        else:
             raise ValueError("Matrix: bad seq len")
-        self.a, self.b, self.c, self.d, self.e, self.f = util_concat_matrix(one, two)
+        if isinstance(two, Matrix):
+            a1, b1, c1, d1, e1, f1 = two.a, two.b, two.c, two.d, two.e, two.f
+        elif len(two) == 6:
+            a1, b1, c1, d1, e1, f1 = map(float, two)
+        else:
+            raise ValueError("Matrix: bad seq len")
+        # Same as fz_concat().
+        self.a = a0 * a1 + b0 * c1
+        self.b = a0 * b1 + b0 * d1
+        self.c = c0 * a1 + d0 * c1
+        self.d = c0 * b1 + d0 * d1
+        self.e = e0 * a1 + f0 * c1 + e1
+        self.f = e0 * b1 + f0 * d1 + f1
         return self
 
     def invert(self, src=None):
@@ -6386,6 +6469,7 @@ class Matrix:
     __inv__ = __invert__
     __div__ = __truediv__
     norm = __abs__
+    __slots__ = ('a', 'b', 'c', 'd', 'e', 'f')
 
 
 class IdentityMatrix(Matrix):
@@ -6402,18 +6486,24 @@ class IdentityMatrix(Matrix):
 
     def __setattr__(self, name, value):
         if name in "ad":
-            self.__dict__[name] = 1.0
+            value = 1.0
         elif name in "bcef":
-            self.__dict__[name] = 0.0
-        else:
-            self.__dict__[name] = value
+            value = 0.0
+        object.__setattr__(self, name, value)
 
     def checkargs(*args):
         raise NotImplementedError("Identity is readonly")
 
+    __slots__ = ()
+
 Identity = IdentityMatrix()
 
 
+_RE_LINK_PAGE_ZOOM = re.compile('^#page=([0-9]+)&zoom=([0-9.]+),([0-9.]+),([0-9.]+)$')
+_RE_LINK_PAGE = re.compile('^#page=([0-9]+)$')
+_LINK_URI_PREFIXES = ("http://", "https://", "mailto:", "ftp://")
+
+
 class linkDest:
     """link or outline destination details"""
 
@@ -6445,13 +6535,13 @@ class linkDest:
             if self.uri.startswith("#"):
                 self.named = ""
                 self.kind = LINK_GOTO
-                m = re.match('^#page=([0-9]+)&zoom=([0-9.]+),([0-9.]+),([0-9.]+)$', self.uri)
+                m = _RE_LINK_PAGE_ZOOM.match(self.uri)
                 if m:
                     self.page = int(m.group(1)) - 1
                     self.lt = Point(float((m.group(3))), float(m.group(4)))
                     self.flags = self.flags | LINK_FLAG_L_VALID | LINK_FLAG_T_VALID
                 else:
-                    m = re.match('^#page=([0-9]+)$', self.uri)
+                    m = _RE_LINK_PAGE.match(self.uri)
                     if m:
                         self.page = int(m.group(1)) - 1
                     else:
@@ -6463,7 +6553,8 @@ class linkDest:
         if obj.is_external:
             if not self.uri:
                 pass
-            elif self.uri.startswith(("http://", "https://", "mailto:", "ftp://")):
+            elif self.uri[0] in "hmf" and self.uri.startswith(_LINK_URI_PREFIXES):
+                # First char test quickly rejects other schemes and paths.
                 self.isUri = True
                 self.kind = LINK_URI
             elif self.uri.startswith("file://"):
@@ -6481,6 +6572,60 @@ class linkDest:
                 self.isUri = True
                 self.kind = LINK_LAUNCH
 
+    __slots__ = (
+            'dest',
+            'fileSpec',
+            'flags',
+            'isMap',
+            'isUri',
+            'kind',
+            'lt',
+            'named',
+            'newWindow',
+            'page',
+            'rb',
+            'uri',
+            )
+
+
+# Valid values of Widget.field_type, same membership as range(1, 8).
+_WIDGET_FIELD_TYPES = frozenset(range(1, 8))
+
+# Widget.field_type values of button-like fields, which carry no scripts
+# other than /A.
+_WIDGET_BUTTON_TYPES = frozenset((
+        mupdf.PDF_WIDGET_TYPE_BUTTON,
+        mupdf.PDF_WIDGET_TYPE_CHECKBOX,
+        mupdf.PDF_WIDGET_TYPE_RADIOBUTTON,
+        ))
+
+# Widget.field_type values that have on/off states: checkbox, radio button.
+_WIDGET_STATE_TYPES = frozenset((
+        mupdf.PDF_WIDGET_TYPE_CHECKBOX,
+        mupdf.PDF_WIDGET_TYPE_RADIOBUTTON,
+        ))
+
+# Lower-cased Widget.text_font values mapped to correctly spelled names.
+_WIDGET_VALID_FONTS = {f.lower(): f for f in ("Cour", "TiRo", "Helv", "ZaDb")}
+
+# Finds the key names in an appearance dict string such as
+# '<</Off 12 0 R/Yes 13 0 R>>'.
+_AP_STATE_RE = re.compile(r"/([^\s/<>()\[\]]+)")
+
+# /DA format strings keyed by number of text color components.
+_WIDGET_DA_FORMATS = {
+        1: "%g g /%s %g Tf",
+        3: "%g %g %g rg /%s %g Tf",
+        4: "%g %g %g %g k /%s %g Tf",
+        }
+
+
+def _ap_states(entry):
+    """State names of an xref_get_key() result for AP/N or AP/D, or None."""
+    if entry[0] == "dict":
+        return _AP_STATE_RE.findall(entry[1])
+    return None
+
 
 class Widget:
     '''
@@ -6533,18 +6678,12 @@ class Widget:
         if not self.text_font:
             self.text_font = "Helv"
             return
-        valid_fonts = ("Cour", "TiRo", "Helv", "ZaDb")
-        for f in valid_fonts:
-            if self.text_font.lower() == f.lower():
-                self.text_font = f
-                return
-        self.text_font = "Helv"
-        return
+        self.text_font = _WIDGET_VALID_FONTS.get(self.text_font.lower(), "Helv")
 
     def _checker(self):
         """Any widget type checks.
         """
-        if self.field_type not in range(1, 8):
+        if self.field_type not in _WIDGET_FIELD_TYPES:
             raise ValueError("bad field type")
 
         # if setting a radio button to ON, first set Off all other buttons
@@ -6573,21 +6712,21 @@ class Widget:
         font = "Helv"
         fsize = 0
         col = (0, 0, 0)
-        dat = self._text_da.split()  # split on any whitespace
-        for i, item in enumerate(dat):
+        operands = []   # operands since the previous operator
+        for item in self._text_da.split():  # split on any whitespace
             if item == "Tf":
-                font = dat[i - 2][1:]
-                fsize = float(dat[i - 1])
-                dat[i] = dat[i-1] = dat[i-2] = ""
-                continue
-            if item == "g":  # unicolor text
-                col = [(float(dat[i - 1]))]
-                dat[i] = dat[i-1] = ""
-                continue
-            if item == "rg":  # RGB colored text
-                col = [float(f) for f in dat[i - 3:i]]
-                dat[i] = dat[i-1] = dat[i-2] = dat[i-3] = ""
+                font = operands[-2][1:]
+                fsize = float(operands[-1])
+            elif item == "g":  # unicolor text
+                col = [float(operands[-1])]
+            elif item == "rg":  # RGB colored text
+                col = [float(f) for f in operands[-3:]]
+            elif item == "k":  # CMYK colored text
+                col = [float(f) for f in operands[-4:]]
+            else:
+                operands.append(item)
                 continue
+            operands.clear()
         self.text_font = font
         self.text_fontsize = fsize
         self.text_color = col
@@ -6622,11 +6761,7 @@ class Widget:
         self.border_style = self.border_style.upper()[0:1]
 
         # standardize content of JavaScript entries
-        btn_type = self.field_type in (
-            PDF_WIDGET_TYPE_BUTTON,
-            PDF_WIDGET_TYPE_CHECKBOX,
-            PDF_WIDGET_TYPE_RADIOBUTTON
-        )
+        btn_type = self.field_type in _WIDGET_BUTTON_TYPES
         if not self.script:
             self.script = None
         elif type(self.script) is not str:
@@ -6662,28 +6797,14 @@ class Widget:
         state is usually called like this, the 'On' state is often given a name
         relating to the functional context.
         """
-        if self.field_type not in (2, 5):
+        if self.field_type not in _WIDGET_STATE_TYPES:
             return None  # no button type
         doc = self.parent.parent
         xref = self.xref
-        states = {"normal": None, "down": None}
-        APN = doc.xref_get_key(xref, "AP/N")
-        if APN[0] == "dict":
-            nstates = []
-            APN = APN[1][2:-2]
-            apnt = APN.split("/")[1:]
-            for x in apnt:
-                nstates.append(x.split()[0])
-            states["normal"] = nstates
-        APD = doc.xref_get_key(xref, "AP/D")
-        if APD[0] == "dict":
-            dstates = []
-            APD = APD[1][2:-2]
-            apdt = APD.split("/")[1:]
-            for x in apdt:
-                dstates.append(x.split()[0])
-            states["down"] = dstates
-        return states
+        return {
+                "normal": _ap_states(doc.xref_get_key(xref, "AP/N")),
+                "down": _ap_states(doc.xref_get_key(xref, "AP/D")),
+                }
 
     @property
     def next(self):
@@ -6696,7 +6817,7 @@ class Widget:
         True. Radio buttons will return the string that is unequal to "Off"
         as returned by method button_states().
         """
-        if self.field_type not in (2, 5):
+        if self.field_type not in _WIDGET_STATE_TYPES:
             return None  # no checkbox or radio button
         if self.field_type == 2:
             return True
@@ -6722,15 +6843,8 @@ class Widget:
         self._adjust_font()  # ensure valid text_font name
 
         # now create the /DA string
-        self._text_da = ""
-        if   len(self.text_color) == 3:
-            fmt = "{:g} {:g} {:g} rg /{f:s} {s:g} Tf" + self._text_da
-        elif len(self.text_color) == 1:
-            fmt = "{:g} g /{f:s} {s:g} Tf" + self._text_da
-        elif len(self.text_color) == 4:
-            fmt = "{:g} {:g} {:g} {:g} k /{f:s} {s:g} Tf" + self._text_da
-        self._text_da = fmt.format(*self.text_color, f=self.text_font,
-                                    s=self.text_fontsize)
+        fmt = _WIDGET_DA_FORMATS[len(self.text_color)]
+        self._text_da = fmt % (*self.text_color, self.text_font, self.text_fontsize)
         # finally update the widget
 
         # if widget has a '/AA/C' script, make sure it is in the '/CO'
@@ -6743,6 +6857,17 @@ class Widget:
         TOOLS._save_widget(self._annot, self)
         self._text_da = ""
 
+    __slots__ = (
+            'border_color', 'border_style', 'border_width', 'border_dashes',
+            'choice_values', 'field_name', 'field_label', 'field_value',
+            'field_flags', 'field_display', 'field_type', 'field_type_string',
+            'fill_color', 'button_caption', 'is_signed', 'text_color',
+            'text_font', 'text_fontsize', 'text_maxlen', 'text_format',
+            '_text_da', 'script', 'script_stroke', 'script_format',
+            'script_change', 'script_calc', 'rect', 'xref', 'parent', '_annot',
+            '__weakref__',
+            )
+
 
 from . import _extra
 
@@ -6751,6 +6876,22 @@ class Outline:
 
     def __init__(self, ol):
         self.this = ol
+        self._info = None
+
+    def _get_info(self):
+        '''
+        Returns (title, uri, page, x, y, is_open, is_external) from a single
+        call to _extra.Outline_info(), or None if not available.
+        '''
+        if not g_use_extra:
+            return None
+        info = self._info
+        if info is None:
+            # Calling _extra.* once per item instead of reading several
+            # SWIG attributes saves significant time when walking large
+            # outlines, e.g. test_toc.py:test_full_toc.
+            info = self._info = _extra.Outline_info( self.this)
+        return info
 
     @property
     def dest(self):
@@ -6767,11 +6908,9 @@ class Outline:
 
     @property
     def is_external(self):
-        if g_use_extra:
-            # calling _extra.* here appears to save significant time in
-            # test_toc.py:test_full_toc, 1.2s=>0.94s.
-            #
-            return _extra.Outline_is_external( self.this)
+        info = self._get_info()
+        if info:
+            return info[6]
         ol = self.this
         if not ol.m_internal:
             return False
@@ -6782,6 +6921,9 @@ class Outline:
 
     @property
     def is_open(self):
+        info = self._get_info()
+        if info:
+            return info[5]
         if 1:
             return self.this.m_internal.is_open
         return self.this.is_open()
@@ -6796,16 +6938,25 @@ class Outline:
 
     @property
     def page(self):
+        info = self._get_info()
+        if info:
+            return info[2]
         if 1:
             return self.this.m_internal.page.page
         return self.this.page().page;
 
     @property
     def title(self):
+        info = self._get_info()
+        if info:
+            return info[0]
         return self.this.m_internal.title
 
     @property
     def uri(self):
+        info = self._get_info()
+        if info:
+            return info[1]
         ol = self.this
         if not ol.m_internal:
             return None
@@ -6813,13 +6964,19 @@ class Outline:
 
     @property
     def x(self):
+        info = self._get_info()
+        if info:
+            return info[3]
         return self.this.m_internal.x
 
     @property
     def y(self):
+        info = self._get_info()
+        if info:
+            return info[4]
         return self.this.m_internal.y
 
-    __slots__ = [ 'this']
+    __slots__ = [ 'this', '_info']
 
 
 def _make_PdfFilterOptions(recurse, instance_forms, ascii, sanitize, sopts=None):
@@ -6880,6 +7037,25 @@ def _make_PdfFilterOptions(recurse, instance_forms, ascii, sanitize, sopts=None)
     return filter_
 
 
+# Annotation types not returned by Page.annots().
+_ANNOT_SKIP_TYPES = frozenset((
+        mupdf.PDF_ANNOT_LINK,
+        mupdf.PDF_ANNOT_POPUP,
+        mupdf.PDF_ANNOT_WIDGET,
+        ))
+
+# Content stream commands showing an image (Page._insert_image()) or a page
+# XObject (Page._show_pdf_page()).
+_IMAGE_DO_COMMAND = b"\nq\n%g %g %g %g %g %g cm\n/%s Do\nQ\n"
+_SHOW_DO_COMMAND = b" q /%s Do Q "
+
+# (CJK_number, serif) of the CJK font names of Page.insert_font().
+_CJK_FONTS = {
+        "china-t": (0, 0), "china-s": (1, 0), "japan": (2, 0), "korea": (3, 0),
+        "china-ts": (0, 1), "china-ss": (1, 1), "japan-s": (2, 1), "korea-s": (3, 1),
+        }
+
+
 class Page:
 
     def __init__(self, page, document):
@@ -6888,8 +7064,10 @@ class Page:
         self.thisown = True
         self.lastPoint = None
         self.draw_cont = ''
-        self._annot_refs = dict()
+        self._annot_refs = weakref.WeakValueDictionary()
         self._parent = document
+        self._parent_desc = None    # parent description for __str__()
+        self._pdf_page_cache = None # (self.this, PdfPage) for _pdf_page()
         if page.m_internal:
             if isinstance( page, mupdf.PdfPage):
                 self.number = page.m_internal.super.number
@@ -6900,30 +7078,26 @@ class Page:
 
     def __repr__(self):
         return self.__str__()
-        CheckParent(self)
-        x = self.parent.name
-        if self.parent.stream is not None:
-            x = "<memory, doc# %i>" % (self.parent._graft_id,)
-        if x == "":
-            x = "<new PDF, doc# %i>" % self.parent._graft_id
-        return "page %s of %s" % (self.number, x)
 
     def __str__(self):
         #CheckParent(self)
-        parent = getattr(self, 'parent', None)
         if isinstance(self.this.m_internal, mupdf.pdf_page):
             number = self.this.m_internal.super.number
         else:
             number = self.this.m_internal.number
-        ret = f'page {number}'
-        if parent:
-            x = self.parent.name
-            if self.parent.stream is not None:
-                x = "<memory, doc# %i>" % (self.parent._graft_id,)
-            if x == "":
-                x = "<new PDF, doc# %i>" % self.parent._graft_id
-            ret += f' of {x}'
-        return ret
+        x = self._parent_desc
+        if x is None:
+            parent = getattr(self, 'parent', None)
+            x = ''
+            if parent:
+                x = parent.name
+                if parent.stream is not None:
+                    x = "<memory, doc# %i>" % (parent._graft_id,)
+                if x == "":
+                    x = "<new PDF, doc# %i>" % parent._graft_id
+                x = f' of {x}'
+            self._parent_desc = x
+        return f'page {number}{x}'
 
     def _add_caret_annot(self, point):
         if g_use_extra:
@@ -6970,11 +7144,11 @@ class Page:
             mupdf.pdf_set_annot_icon_name(annot, icon)
 
         val = JM_embed_file(page.doc(), filebuf, filename, uf, d, 1)
-        mupdf.pdf_dict_put(annot.pdf_annot_obj(), PDF_NAME('FS'), val)
-        mupdf.pdf_dict_put_text_string(annot.pdf_annot_obj(), PDF_NAME('Contents'), filename)
+        mupdf.pdf_dict_put(annot.pdf_annot_obj(), _N_FS, val)
+        mupdf.pdf_dict_put_text_string(annot.pdf_annot_obj(), _N_CONTENTS, filename)
         mupdf.pdf_update_annot(annot)
+        # appearance synthesis may have resized the icon: restore our rect
         mupdf.pdf_set_annot_rect(annot, r)
-        mupdf.pdf_set_annot_flags(annot, flags)
         JM_add_annot_id(annot, "A")
         return Annot(annot)
 
@@ -6999,8 +7173,8 @@ class Page:
         annot_obj = mupdf.pdf_annot_obj( annot)
         mupdf.pdf_set_annot_contents( annot, text)
         mupdf.pdf_set_annot_rect( annot, r)
-        mupdf.pdf_dict_put_int( annot_obj, PDF_NAME('Rotate'), rotate);
-        mupdf.pdf_dict_put_int( annot_obj, PDF_NAME('Q'), align);
+        mupdf.pdf_dict_put_int( annot_obj, _N_ROTATE, rotate);
+        mupdf.pdf_dict_put_int( annot_obj, _N_Q, align);
 
         if nfcol > 0:
             mupdf.pdf_set_annot_color( annot, fcol[:nfcol])
@@ -7014,21 +7188,19 @@ class Page:
         #%pythonappend _add_freetext_annot   
         ap = val._getAP()
         BT = ap.find(b"BT")
-        ET = ap.find(b"ET") + 2
-        ap = ap[BT:ET]
+        ET = ap.find(b"ET", max(BT, 0)) + 2
         w = rect[2]-rect[0]
         h = rect[3]-rect[1]
         if rotate in (90, -90, 270):
             w, h = h, w
-        re = b"0 0 %g %g re" % (w, h)
-        ap = re + b"\nW\nn\n" + ap
+        re_ = b"0 0 %g %g re" % (w, h)
         ope = None
         bwidth = b""
-        fill_string = ColorCode(fill_color, "f").encode()
+        fill_string = ColorCode(fill_color, "f").encode() if fill_color else b""
         if fill_string:
             fill_string += b"\n"
             ope = b"f"
-        stroke_string = ColorCode(border_color, "c").encode()
+        stroke_string = ColorCode(border_color, "c").encode() if border_color else b""
         if stroke_string:
             stroke_string += b"\n"
             bwidth = b"1 w\n"
@@ -7036,12 +7208,15 @@ class Page:
         if fill_string and stroke_string:
             ope = b"B"
         if ope != None:
-            ap = bwidth + fill_string + stroke_string + re + b"\n" + ope + b"\n" + ap
-        val._setAP(ap)
+            parts = [bwidth, fill_string, stroke_string, re_, b"\n", ope, b"\n"]
+        else:
+            parts = []
+        parts += [re_, b"\nW\nn\n", ap[BT:ET]]
+        val._setAP(b"".join(parts))
         return val
 
     def _add_ink_annot(self, list):
-        page = mupdf.pdf_page_from_fz_page(self.this)
+        page = self._pdf_page()
         ASSERT_PDF(page);
         if not PySequence_Check(list):
             raise ValueError( MSG_BAD_ARG_INK_ANNOT)
@@ -7052,23 +7227,30 @@ class Page:
         annot_obj = mupdf.pdf_annot_obj(annot)
         n0 = len(list)
         inklist = mupdf.pdf_new_array(page.doc(), n0)
+        # Apply inv_ctm directly instead of creating and transforming an
+        # FzPoint for every stroke point.
+        a, b, c, d, e, f = inv_ctm.a, inv_ctm.b, inv_ctm.c, inv_ctm.d, inv_ctm.e, inv_ctm.f
+        push_real = mupdf.pdf_array_push_real
 
         for j in range(n0):
             sublist = list[j]
             n1 = len(sublist)
             stroke = mupdf.pdf_new_array(page.doc(), 2 * n1)
 
-            for i in range(n1):
-                p = sublist[i]
-                if not PySequence_Check(p) or PySequence_Size(p) != 2:
+            for p in sublist:
+                try:
+                    x, y = p
+                    x, y = float(x), float(y)
+                except (TypeError, ValueError):
                     raise ValueError( MSG_BAD_ARG_INK_ANNOT)
-                point = mupdf.fz_transform_point(JM_point_from_py(p), inv_ctm)
-                mupdf.pdf_array_push_real(stroke, point.x)
-                mupdf.pdf_array_push_real(stroke, point.y)
+                x = min(max(x, FZ_MIN_INF_RECT), FZ_MAX_INF_RECT)
+                y = min(max(y, FZ_MIN_INF_RECT), FZ_MAX_INF_RECT)
+                push_real(stroke, x * a + y * c + e)
+                push_real(stroke, x * b + y * d + f)
 
             mupdf.pdf_array_push(inklist, stroke)
 
-        mupdf.pdf_dict_put(annot_obj, PDF_NAME('InkList'), inklist)
+        mupdf.pdf_dict_put(annot_obj, _N_INKLIST, inklist)
         mupdf.pdf_update_annot(annot)
         JM_add_annot_id(annot, "A")
         return Annot(annot)
@@ -7114,15 +7296,15 @@ class Page:
             arr = mupdf.pdf_new_array(page.doc(), nfcol)
             for i in range(nfcol):
                 mupdf.pdf_array_push_real(arr, fcol[i])
-            mupdf.pdf_dict_put(annot.pdf_annot_obj(), PDF_NAME('IC'), arr)
+            mupdf.pdf_dict_put(annot.pdf_annot_obj(), _N_IC, arr)
         if text:
             mupdf.pdf_dict_puts(
                     annot.pdf_annot_obj(),
                     "OverlayText",
                     mupdf.pdf_new_text_string(text),
                     )
-            mupdf.pdf_dict_put_text_string(annot.pdf_annot_obj(), PDF_NAME('DA'), da_str)
-            mupdf.pdf_dict_put_int(annot.pdf_annot_obj(), PDF_NAME('Q'), align)
+            mupdf.pdf_dict_put_text_string(annot.pdf_annot_obj(), _N_DA, da_str)
+            mupdf.pdf_dict_put_int(annot.pdf_annot_obj(), _N_Q, align)
         mupdf.pdf_update_annot(annot)
         JM_add_annot_id(annot, "A")
         annot = mupdf.ll_pdf_keep_annot(annot.m_internal)
@@ -7143,22 +7325,7 @@ class Page:
 
     def _add_stamp_annot(self, rect, stamp=0):
         page = self._pdf_page()
-        stamp_id = [
-                PDF_NAME('Approved'),
-                PDF_NAME('AsIs'),
-                PDF_NAME('Confidential'),
-                PDF_NAME('Departmental'),
-                PDF_NAME('Experimental'),
-                PDF_NAME('Expired'),
-                PDF_NAME('Final'),
-                PDF_NAME('ForComment'),
-                PDF_NAME('ForPublicRelease'),
-                PDF_NAME('NotApproved'),
-                PDF_NAME('NotForPublicRelease'),
-                PDF_NAME('Sold'),
-                PDF_NAME('TopSecret'),
-                PDF_NAME('Draft'),
-                ]
+        stamp_id = _STAMP_NAMES
         n = len(stamp_id)
         name = stamp_id[0]
         ASSERT_PDF(page)
@@ -7170,14 +7337,13 @@ class Page:
         annot = mupdf.pdf_create_annot(page, mupdf.PDF_ANNOT_STAMP)
         mupdf.pdf_set_annot_rect(annot, r)
         try:
-            n = PDF_NAME('Name')
-            mupdf.pdf_dict_put(annot.pdf_annot_obj(), PDF_NAME('Name'), name)
+            mupdf.pdf_dict_put(annot.pdf_annot_obj(), _N_NAME, name)
         except Exception as e:
             if g_exceptions_verbose:    exception_info()
             raise
         mupdf.pdf_set_annot_contents(
                 annot,
-                mupdf.pdf_dict_get_name(annot.pdf_annot_obj(), PDF_NAME('Name')),
+                mupdf.pdf_dict_get_name(annot.pdf_annot_obj(), _N_NAME),
                 )
         mupdf.pdf_update_annot(annot)
         JM_add_annot_id(annot, "A")
@@ -7217,27 +7383,26 @@ class Page:
         CheckParent(self)
         if g_use_extra:
             return extra.Page_addAnnot_FromString( self.this, linklist)
-        page = mupdf.pdf_page_from_fz_page(self.this)
+        page = self._pdf_page()
         lcount = len(linklist)  # link count
         if lcount < 1:
             return
-        i = -1
 
         # insert links from the provided sources
         ASSERT_PDF(page)
-        if not mupdf.pdf_dict_get( page.obj(), PDF_NAME('Annots')).m_internal:
-            mupdf.pdf_dict_put_array( page.obj(), PDF_NAME('Annots'), lcount)
-        annots = mupdf.pdf_dict_get( page.obj(), PDF_NAME('Annots'))
+        if not mupdf.pdf_dict_get( page.obj(), _N_ANNOTS).m_internal:
+            mupdf.pdf_dict_put_array( page.obj(), _N_ANNOTS, lcount)
+        annots = mupdf.pdf_dict_get( page.obj(), _N_ANNOTS)
         assert annots.m_internal, f'lcount={lcount} annots.m_internal={annots.m_internal}'
-        for i in range(lcount):
-            txtpy = linklist[i]
+        pdf = page.doc()
+        for i, txtpy in enumerate(linklist):
             text = JM_StrAsChar(txtpy)
             if not text:
-                PySys_WriteStderr("skipping bad link / annot item %i.\n", i);
+                sys.stderr.write("skipping bad link / annot item %i.\n" % i)
                 continue
             try:
-                annot = mupdf.pdf_add_object( page.doc(), JM_pdf_obj_from_str( page.doc(), text))
-                ind_obj = mupdf.pdf_new_indirect( page.doc(), mupdf.pdf_to_num( annot), 0)
+                annot = mupdf.pdf_add_object( pdf, JM_pdf_obj_from_str( pdf, text))
+                ind_obj = mupdf.pdf_new_indirect( pdf, mupdf.pdf_to_num( annot), 0)
                 mupdf.pdf_array_push( annots, ind_obj)
             except Exception as e:
                 if g_exceptions_verbose:    exception_info()
@@ -7269,6 +7434,8 @@ class Page:
             exception_info()
             pass
         self._parent = None
+        self._parent_desc = None
+        self._pdf_page_cache = None
         self.thisown = False
         self.number = None
 
@@ -7280,17 +7447,11 @@ class Page:
         if not ("/Type/OCG" in check or "/Type/OCMD" in check):
             #log( 'raising "bad optional content"')
             raise ValueError("bad optional content: 'oc'")
-        #log( 'Looking at self._get_resource_properties()')
-        props = {}
-        for p, x in self._get_resource_properties():
-            props[x] = p
-        if oc in props.keys():
-            return props[oc]
-        i = 0
-        mc = "MC%i" % i
-        while mc in props.values():
-            i += 1
-            mc = "MC%i" % i
+        page = self._pdf_page()
+        ASSERT_PDF(page)
+        mc, found = JM_resource_property_name(page.obj(), oc)
+        if found:
+            return mc
         self._set_resource_property(mc, oc)
         #log( 'returning {mc=}')
         return mc
@@ -7325,122 +7486,67 @@ class Page:
         mupdf.fz_close_device(dev)
         return tpage
 
-    def _insert_image(self,
-            filename=None, pixmap=None, stream=None, imask=None, clip=None,
-            overlay=1, rotate=0, keep_proportion=1, oc=0, width=0, height=0,
-            xref=0, alpha=-1, _imgname=None, digests=None
-            ):
-        maskbuf = mupdf.FzBuffer()
-        page = self._pdf_page()
-        # This will create an empty PdfDocument with a call to
-        # pdf_new_document() then assign page.doc()'s return value to it (which
-        # drop the original empty pdf_document).
-        pdf = page.doc()
-        w = width
-        h = height
-        img_xref = xref
-        rc_digest = 0
-        template = "\nq\n%g %g %g %g %g %g cm\n/%s Do\nQ\n"
-
-        do_process_pixmap = 1
-        do_process_stream = 1
-        do_have_imask = 1
-        do_have_image = 1
-        do_have_xref = 1
-
-        if xref > 0:
-            ref = mupdf.pdf_new_indirect(pdf, xref, 0)
-            w = mupdf.pdf_to_int( mupdf.pdf_dict_geta( ref, PDF_NAME('Width'), PDF_NAME('W')))
-            h = mupdf.pdf_to_int( mupdf.pdf_dict_geta( ref, PDF_NAME('Height'), PDF_NAME('H')))
-            if w + h == 0:
-                raise ValueError( MSG_IS_NO_IMAGE);
-            #goto have_xref()
-            do_process_pixmap = 0
-            do_process_stream = 0
-            do_have_imask = 0
-            do_have_image = 0
+    def _img_finalize(self, pdf, image, oc, md5_py, digests):
+        '''
+        Add new image `image` to `pdf` and record it in `digests`. Returns the
+        image reference.
+        '''
+        ref =  mupdf.pdf_add_image(pdf, image)
+        if oc:
+            JM_add_oc_object(pdf, ref, oc)
+        digests[md5_py] = mupdf.pdf_to_num(ref)
+        return ref
 
+    def _img_from_pixmap(self, pdf, pixmap, digests):
+        '''
+        Returns (ref, image, w, h, md5_py) for a Pixmap. `ref` is set if the
+        pixmap is already in `digests`, else `image` is a new image.
+        '''
+        arg_pix = pixmap.this
+        w = mupdf.fz_pixmap_width(arg_pix)
+        h = mupdf.fz_pixmap_height(arg_pix)
+        md5_py = JM_image_digest(
+                b"%i %i %i" % (w, h, mupdf.fz_pixmap_components(arg_pix)),
+                arg_pix.fz_pixmap_samples_memoryview(),
+                )
+        temp = digests.get(md5_py, None)
+        if temp is not None:
+            return mupdf.pdf_new_indirect(pdf, temp, 0), None, w, h, md5_py
+        if arg_pix.alpha() == 0:
+            image = mupdf.fz_new_image_from_pixmap(arg_pix, mupdf.FzImage(0))
         else:
-            if stream:
-                imgbuf = JM_BufferFromBytes(stream)
-                do_process_pixmap = 0
-            else:
-                if filename:
-                    imgbuf = mupdf.fz_read_file(filename)
-                    #goto have_stream()
-                    do_process_pixmap = 0
-
-        if do_process_pixmap:
-            #log( 'do_process_pixmap')
-            # process pixmap ---------------------------------
-            arg_pix = pixmap.this
-            w = arg_pix.w
-            h = arg_pix.h
-            digest = mupdf.fz_md5_pixmap(arg_pix)
-            md5_py = digest
-            temp = digests.get(md5_py, None)
-            if temp is not None:
-                img_xref = temp
-                ref = mupdf.pdf_new_indirect(page.doc(), img_xref, 0)
-                #goto have_xref()
-                do_process_stream = 0
-                do_have_imask = 0
-                do_have_image = 0
-            else:
-                if arg_pix.alpha() == 0:
-                    image = mupdf.fz_new_image_from_pixmap(arg_pix, mupdf.FzImage(0))
-                else:
-                    pm = mupdf.fz_convert_pixmap(
-                            arg_pix,
-                            mupdf.FzColorspace(0),
-                            mupdf.FzColorspace(0),
-                            mupdf.FzDefaultColorspaces(0),
-                            mupdf.FzColorParams(),
-                            1,
-                            )
-                    pm.alpha = 0;
-                    pm.colorspace = NULL;
-                    mask = mupdf.fz_new_image_from_pixmap(pm, mupdf.FzImage(0))
-                    image = mupdf.fz_new_image_from_pixmap(arg_pix, mask)
-                #goto have_image()
-                do_process_stream = 0
-                do_have_imask = 0
-
-        if do_process_stream:
-            #log( 'do_process_stream')
-            # process stream ---------------------------------
-            state = mupdf.FzMd5()
-            if mupdf_cppyy:
-                mupdf.fz_md5_update_buffer( state, imgbuf)
-            else:
-                mupdf.fz_md5_update(state, imgbuf.m_internal.data, imgbuf.m_internal.len)
-            if imask:
-                maskbuf = JM_BufferFromBytes(imask)
-                if mupdf_cppyy:
-                    mupdf.fz_md5_update_buffer( state, maskbuf)
-                else:
-                    fz_md5_update(state, maskbuf.m_internal.data, maskbuf.m_internal.len)
-            digest = state.fz_md5_final2()
-            md5_py = bytes(digest)
-            temp = digests.get(md5_py, None)
-            if temp is not None:
-                img_xref = temp
-                ref = mupdf.pdf_new_indirect(page.doc(), img_xref, 0)
-                w = mupdf.pdf_to_int( mupdf.pdf_dict_geta( ref, PDF_NAME('Width'), PDF_NAME('W')))
-                h = mupdf.pdf_to_int( mupdf.pdf_dict_geta( ref, PDF_NAME('Height'), PDF_NAME('H')))
-                #goto have_xref()
-                do_have_imask = 0
-                do_have_image = 0
-            else:
-                image = mupdf.fz_new_image_from_buffer(imgbuf)
-                w = image.w()
-                h = image.h()
-                if not imask:
-                    #goto have_image()
-                    do_have_imask = 0
-
-        if do_have_imask:
-            #log( 'do_have_imask')
+            # copy just the alpha plane, as a maskless 1-component pixmap
+            pm = mupdf.fz_new_pixmap_from_alpha_channel(arg_pix)
+            pm.m_internal.alpha = 0
+            mask = mupdf.fz_new_image_from_pixmap(pm, mupdf.FzImage(0))
+            image = mupdf.fz_new_image_from_pixmap(arg_pix, mask)
+        return None, image, w, h, md5_py
+
+    def _img_from_stream(self, pdf, stream, filename, imask, digests):
+        '''
+        Returns (ref, image, w, h, md5_py) for image data in `stream` or file
+        `filename`, with optional mask data `imask`. `ref` is set if the data
+        is already in `digests`, else `image` is a new image.
+        '''
+        if stream:
+            imgbuf = JM_BufferFromBytes(stream)
+            chunks = [stream if isinstance(stream, (bytes, bytearray)) else JM_BinFromBuffer(imgbuf)]
+        else:
+            imgbuf = mupdf.fz_read_file(filename)
+            chunks = [JM_BinFromBuffer(imgbuf)]
+        if imask:
+            maskbuf = JM_BufferFromBytes(imask)
+            chunks.append(imask if isinstance(imask, (bytes, bytearray)) else JM_BinFromBuffer(maskbuf))
+        md5_py = JM_image_digest(*chunks)
+        temp = digests.get(md5_py, None)
+        if temp is not None:
+            ref, w, h = self._img_from_xref(pdf, temp)
+            return ref, None, w, h, md5_py
+
+        image = mupdf.fz_new_image_from_buffer(imgbuf)
+        w = image.w()
+        h = image.h()
+        if imask:
             # mupdf.FzCompressedBuffer is not copyable, so
             # mupdf.fz_compressed_image_buffer() does not work - it cannot
             # return by value. So we need to construct locally from a raw
@@ -7453,47 +7559,69 @@ class Page:
             colorspace = image.colorspace()
             xres, yres = mupdf.fz_image_resolution(image)
             mask = mupdf.fz_new_image_from_buffer(maskbuf)
-            zimg = mupdf.fz_new_image_from_compressed_buffer(
+            image = mupdf.fz_new_image_from_compressed_buffer(
                     w, h,
                     bpc, colorspace, xres, yres, 1, 0, NULL,
                     NULL, cbuf1, mask
                     )
-            freethis = image
-            image = zimg
-            #goto have_image()
-
-        if do_have_image:
-            #log( 'do_have_image')
-            ref =  mupdf.pdf_add_image(pdf, image)
-            if oc:
-                JM_add_oc_object(pdf, ref, oc)
-            img_xref = mupdf.pdf_to_num(ref)
-            digests[md5_py] = img_xref
-            rc_digest = 1
-
-        if do_have_xref:
-            #log( 'do_have_xref')
-            resources = mupdf.pdf_dict_get_inheritable(page.obj(), PDF_NAME('Resources'))
-            if not resources.m_internal:
-                resources = mupdf.pdf_dict_put_dict(page.obj(), PDF_NAME('Resources'), 2)
-            xobject = mupdf.pdf_dict_get(resources, PDF_NAME('XObject'))
-            if not xobject.m_internal:
-                xobject = mupdf.pdf_dict_put_dict(resources, PDF_NAME('XObject'), 2)
-            mat = calc_image_matrix(w, h, clip, rotate, keep_proportion)
-            mupdf.pdf_dict_puts(xobject, _imgname, ref);
-            nres = mupdf.fz_new_buffer(50)
-            #mupdf.fz_append_printf(nres, template, mat.a, mat.b, mat.c, mat.d, mat.e, mat.f, _imgname)
-            # fixme: this does not use fz_append_printf()'s special handling of %g etc.
-            s = template % (mat.a, mat.b, mat.c, mat.d, mat.e, mat.f, _imgname)
-            #s = s.replace('\n', '\r\n')
-            mupdf.fz_append_string(nres, s)
-            JM_insert_contents(pdf, page.obj(), nres, overlay)
+        return None, image, w, h, md5_py
+
+    def _img_from_xref(self, pdf, xref):
+        '''
+        Returns (ref, w, h) of existing image `xref`.
+        '''
+        ref = mupdf.pdf_new_indirect(pdf, xref, 0)
+        w = mupdf.pdf_to_int( mupdf.pdf_dict_geta( ref, _N_WIDTH, _N_W))
+        h = mupdf.pdf_to_int( mupdf.pdf_dict_geta( ref, _N_HEIGHT, _N_H))
+        if w + h == 0:
+            raise ValueError( MSG_IS_NO_IMAGE);
+        return ref, w, h
+
+    def _insert_image(self,
+            filename=None, pixmap=None, stream=None, imask=None, clip=None,
+            overlay=1, rotate=0, keep_proportion=1, oc=0, width=0, height=0,
+            xref=0, alpha=-1, _imgname=None, digests=None
+            ):
+        page = self._pdf_page()
+        # This will create an empty PdfDocument with a call to
+        # pdf_new_document() then assign page.doc()'s return value to it (which
+        # drop the original empty pdf_document).
+        pdf = page.doc()
 
-        if rc_digest:
+        if xref > 0:
+            # re-use an existing image: no digest or image creation needed
+            ref, w, h = self._img_from_xref(pdf, xref)
+            self._insert_image_ref(page, ref, w, h, clip, rotate, keep_proportion, overlay, _imgname)
+            return xref, None
+
+        if stream or filename:
+            ref, image, w, h, md5_py = self._img_from_stream(pdf, stream, filename, imask, digests)
+        else:
+            ref, image, w, h, md5_py = self._img_from_pixmap(pdf, pixmap, digests)
+        if image is not None:
+            ref = self._img_finalize(pdf, image, oc, md5_py, digests)
+
+        self._insert_image_ref(page, ref, w, h, clip, rotate, keep_proportion, overlay, _imgname)
+
+        img_xref = mupdf.pdf_to_num(ref)
+        if image is not None:
             return img_xref, digests
         else:
             return img_xref, None
 
+    def _insert_image_ref(self, page, ref, w, h, clip, rotate, keep_proportion, overlay, _imgname):
+        '''
+        Register image `ref` as /XObject `_imgname` of pdf page `page` and
+        append a command displaying it to the page's /Contents.
+        '''
+        mat = calc_image_matrix(w, h, clip, rotate, keep_proportion)
+        mupdf.pdf_dict_puts(self._xobject_dict(page), _imgname, ref);
+        # fixme: this does not use fz_append_printf()'s special handling of %g etc.
+        nres = mupdf.fz_new_buffer_from_copied_data(
+                _IMAGE_DO_COMMAND % (mat.a, mat.b, mat.c, mat.d, mat.e, mat.f, _imgname.encode())
+                )
+        JM_insert_contents(page.doc(), page.obj(), nres, overlay)
+
     def _insertFont(self, fontname, bfname, fontfile, fontbuffer, set_simple, idx, wmode, serif, encoding, ordering):
         page = self._pdf_page()
         ASSERT_PDF(page);
@@ -7501,11 +7629,11 @@ class Page:
 
         value = JM_insert_font(pdf, bfname, fontfile,fontbuffer, set_simple, idx, wmode, serif, encoding, ordering)
         # get the objects /Resources, /Resources/Font
-        resources = mupdf.pdf_dict_get_inheritable( page.obj(), PDF_NAME('Resources'))
-        fonts = mupdf.pdf_dict_get(resources, PDF_NAME('Font'))
+        resources = mupdf.pdf_dict_get_inheritable( page.obj(), _N_RESOURCES)
+        fonts = mupdf.pdf_dict_get(resources, _N_FONT)
         if not fonts.m_internal:    # page has no fonts yet
             fonts = mupdf.pdf_new_dict(pdf, 5)
-            mupdf.pdf_dict_putl(page.obj(), fonts, PDF_NAME('Resources'), PDF_NAME('Font'))
+            mupdf.pdf_dict_putl(page.obj(), fonts, _N_RESOURCES, _N_FONT)
         # store font in resources and fonts objects will contain named reference to font
         _, xref = JM_INT_ITEM(value, 0)
         if not xref:
@@ -7529,7 +7657,7 @@ class Page:
 
     def _other_box(self, boxtype):
         rect = mupdf.FzRect( mupdf.FzRect.Fixed_INFINITE)
-        page = mupdf.pdf_page_from_fz_page( self.this)
+        page = self._pdf_page()
         if page.m_internal:
             obj = mupdf.pdf_dict_gets( page.obj(), boxtype)
             if mupdf.pdf_is_array(obj):
@@ -7538,14 +7666,45 @@ class Page:
             return
         return JM_py_from_rect(rect)
 
+    def _other_box_rect(self, boxtype):
+        """Box `boxtype` in unrotated page coordinates, defaulting to CropBox."""
+        rect = self._other_box(boxtype)
+        if rect is None:
+            return self.cropbox
+        mb_y1 = self.mediabox.y1
+        return Rect(rect[0], mb_y1 - rect[3], rect[2], mb_y1 - rect[1])
+
     def _pdf_page(self):
         '''
         Returns self.this as a mupdf.PdfPage using pdf_page_from_fz_page() if
-        required.
+        required. The conversion is cached until self.this changes.
         '''
-        if isinstance(self.this, mupdf.PdfPage):
-            return self.this
-        return self.this.pdf_page_from_fz_page()
+        this = self.this
+        cached = self._pdf_page_cache
+        if cached is not None and cached[0] is this:
+            return cached[1]
+        if isinstance(this, mupdf.PdfPage):
+            page = this
+        else:
+            page = this.pdf_page_from_fz_page()
+        self._pdf_page_cache = this, page
+        return page
+
+    @contextlib.contextmanager
+    def _zero_rotation(self):
+        '''
+        Context manager running its body with page rotation 0. The rotation
+        is only changed and restored if it is not 0 already.
+        '''
+        old_rotation = self.rotation
+        if old_rotation == 0:
+            yield
+            return
+        self.set_rotation(0)
+        try:
+            yield
+        finally:
+            self.set_rotation(old_rotation)
 
     def _reset_annot_refs(self):
         """Invalidate / delete all annots of this page."""
@@ -7565,23 +7724,19 @@ class Page:
 
         if not gstate:
             return
-        page = mupdf.pdf_page_from_fz_page(self.this)
+        page = self._pdf_page()
         ASSERT_PDF(page)
-        resources = mupdf.pdf_dict_get(page.obj(), PDF_NAME('Resources'))
+        resources = mupdf.pdf_dict_get(page.obj(), _N_RESOURCES)
         if not resources.m_internal:
-            resources = mupdf.pdf_dict_put_dict(page.obj(), PDF_NAME('Resources'), 2)
-        extg = mupdf.pdf_dict_get(resources, PDF_NAME('ExtGState'))
+            resources = mupdf.pdf_dict_put_dict(page.obj(), _N_RESOURCES, 2)
+        extg = mupdf.pdf_dict_get(resources, _N_EXTGSTATE)
         if not extg.m_internal:
-            extg = mupdf.pdf_dict_put_dict(resources, PDF_NAME('ExtGState'), 2)
-        n = mupdf.pdf_dict_len(extg)
-        for i in range(m):
-            o1 = mupdf.pdf_dict_get_key(extg, i)
-            name = mupdf.pdf_to_name(o1)
-            if name == gstate:
-                return gstate
+            extg = mupdf.pdf_dict_put_dict(resources, _N_EXTGSTATE, 2)
+        if mupdf.pdf_dict_gets(extg, gstate).m_internal:
+            return gstate   # already present
         opa = mupdf.pdf_new_dict(page.doc(), 3)
-        mupdf.pdf_dict_put_real(opa, PDF_NAME('CA'), CA)
-        mupdf.pdf_dict_put_real(opa, PDF_NAME('ca'), ca)
+        mupdf.pdf_dict_put_real(opa, _N_CA, CA)
+        mupdf.pdf_dict_put_real(opa, _N_ca, ca)
         mupdf.pdf_dict_puts(extg, gstate, opa)
         return gstate
 
@@ -7613,57 +7768,85 @@ class Page:
         cropbox = JM_rect_from_py(clip)
         mat = JM_matrix_from_py(matrix)
         rc_xref = xref
-        tpage = mupdf.pdf_page_from_fz_page(self.this)
+        tpage = self._pdf_page()
         tpageref = tpage.obj()
         pdfout = tpage.doc()    # target PDF
         ENSURE_OPERATION(pdfout)
-        #-------------------------------------------------------------
-        # convert the source page to a Form XObject
-        #-------------------------------------------------------------
-        xobj1 = JM_xobject_from_page(pdfout, fz_srcpage, xref, graftmap.this)
-        if not rc_xref:
-            rc_xref = mupdf.pdf_to_num(xobj1)
-
-        #-------------------------------------------------------------
-        # create referencing XObject (controls display on target page)
-        #-------------------------------------------------------------
-        # fill reference to xobj1 into the /Resources
-        #-------------------------------------------------------------
-        subres1 = mupdf.pdf_new_dict(pdfout, 5)
-        mupdf.pdf_dict_puts(subres1, "fullpage", xobj1)
-        subres = mupdf.pdf_new_dict(pdfout, 5)
-        mupdf.pdf_dict_put(subres, PDF_NAME('XObject'), subres1)
-
-        res = mupdf.fz_new_buffer(20)
-        mupdf.fz_append_string(res, "/fullpage Do")
-
-        xobj2 = mupdf.pdf_new_xobject(pdfout, cropbox, mat, subres, res)
-        if oc > 0:
-            JM_add_oc_object(pdfout, mupdf.pdf_resolve_indirect(xobj2), oc)
+        # A source page shown before with the same clip, matrix and oc can
+        # re-use the referencing XObject made then.
+        shown = self.parent.ShownXObjects
+        def xobj2_key(src_xref):
+            return (src_xref,
+                    cropbox.x0, cropbox.y0, cropbox.x1, cropbox.y1,
+                    mat.a, mat.b, mat.c, mat.d, mat.e, mat.f,
+                    oc,
+                    )
+        xobj2_xref = shown.get(xobj2_key(xref), 0) if xref > 0 else 0
+        if xobj2_xref and not JM_is_shown_xobject(pdfout, xobj2_xref, xref):
+            # deleted, renumbered or changed since it was recorded
+            del shown[xobj2_key(xref)]
+            xobj2_xref = 0
+        if xobj2_xref:
+            xobj2 = mupdf.pdf_new_indirect(pdfout, xobj2_xref, 0)
+        else:
+            #-------------------------------------------------------------
+            # convert the source page to a Form XObject
+            #-------------------------------------------------------------
+            xobj1 = JM_xobject_from_page(pdfout, fz_srcpage, xref, graftmap.this)
+            if not rc_xref:
+                rc_xref = mupdf.pdf_to_num(xobj1)
+
+            #-------------------------------------------------------------
+            # create referencing XObject (controls display on target page)
+            #-------------------------------------------------------------
+            # fill reference to xobj1 into the /Resources
+            #-------------------------------------------------------------
+            subres1 = mupdf.pdf_new_dict(pdfout, 5)
+            mupdf.pdf_dict_puts(subres1, "fullpage", xobj1)
+            subres = mupdf.pdf_new_dict(pdfout, 5)
+            mupdf.pdf_dict_put(subres, _N_XOBJECT, subres1)
+
+            res = mupdf.fz_new_buffer(20)
+            mupdf.fz_append_string(res, "/fullpage Do")
+
+            xobj2 = mupdf.pdf_new_xobject(pdfout, cropbox, mat, subres, res)
+            if oc > 0:
+                JM_add_oc_object(pdfout, mupdf.pdf_resolve_indirect(xobj2), oc)
+            shown[xobj2_key(rc_xref)] = mupdf.pdf_to_num(xobj2)
 
         #-------------------------------------------------------------
         # update target page with xobj2:
         #-------------------------------------------------------------
         # 1. insert Xobject in Resources
         #-------------------------------------------------------------
-        resources = mupdf.pdf_dict_get_inheritable(tpageref, PDF_NAME('Resources'))
-        subres = mupdf.pdf_dict_get(resources, PDF_NAME('XObject'))
+        resources = mupdf.pdf_dict_get_inheritable(tpageref, _N_RESOURCES)
+        subres = mupdf.pdf_dict_get(resources, _N_XOBJECT)
         if not subres.m_internal:
-            subres = mupdf.pdf_dict_put_dict(resources, PDF_NAME('XObject'), 5)
+            subres = mupdf.pdf_dict_put_dict(resources, _N_XOBJECT, 5)
 
         mupdf.pdf_dict_puts(subres, _imgname, xobj2)
 
         #-------------------------------------------------------------
         # 2. make and insert new Contents object
         #-------------------------------------------------------------
-        nres = mupdf.fz_new_buffer(50) # buffer for Do-command
-        mupdf.fz_append_string(nres, " q /")   # Do-command
-        mupdf.fz_append_string(nres, _imgname)
-        mupdf.fz_append_string(nres, " Do Q ")
+        # buffer for Do-command
+        nres = mupdf.fz_new_buffer_from_copied_data(_SHOW_DO_COMMAND % _imgname.encode())
 
         JM_insert_contents(pdfout, tpageref, nres, overlay)
         return rc_xref
 
+    def _xobject_dict(self, page):
+        '''
+        The /Resources/XObject dict of pdf page `page`, created if missing.
+        '''
+        resources = mupdf.pdf_dict_get_inheritable(page.obj(), _N_RESOURCES)
+        if not resources.m_internal:
+            resources = mupdf.pdf_dict_put_dict(page.obj(), _N_RESOURCES, 2)
+        xobject = mupdf.pdf_dict_get(resources, _N_XOBJECT)
+        if not xobject.m_internal:
+            xobject = mupdf.pdf_dict_put_dict(resources, _N_XOBJECT, 2)
+        return xobject
+
     def add_caret_annot(self, point: point_like) -> "struct Annot *":
         """Add a 'Caret' annotation."""
         old_rotation = annot_preprocess(self)
@@ -7862,15 +8045,9 @@ class Page:
         # change appearance to show a crossed-out rectangle
         #-------------------------------------------------------------
         if cross_out:
-            ap_tab = annot._getAP().splitlines()[:-1]  # get the 4 commands only
-            _, LL, LR, UR, UL = ap_tab
-            ap_tab.append(LR)
-            ap_tab.append(LL)
-            ap_tab.append(UR)
-            ap_tab.append(LL)
-            ap_tab.append(UL)
-            ap_tab.append(b"S")
-            ap = b"\n".join(ap_tab)
+            # get the 4 commands only
+            first, LL, LR, UR, UL = annot._getAP().splitlines()[:-1]
+            ap = b"\n".join((first, LL, LR, UR, UL, LR, LL, UR, LL, UL, b"S"))
             annot._setAP(ap, 0)
         return annot
 
@@ -7958,14 +8135,10 @@ class Page:
     def annot_xrefs(self):
         """List of xref numbers of annotations, fields and links."""
         CheckParent(self)
-        if 0 and g_use_extra:
-            ret = extra.JM_get_annot_xref_list2( self.this)
-            return ret
         page = self._pdf_page()
         if not page.m_internal:
             return []
-        ret = JM_get_annot_xref_list(page.obj())
-        return ret
+        return JM_get_annot_xref_list(page.obj())
 
     def annots(self, types=None):
         """ Generator over the annotations of a page.
@@ -7975,33 +8148,26 @@ class Page:
                    all annotations are returned. E.g. types=[PDF_ANNOT_LINE]
                    will only yield line annotations.
         """
-        skip_types = (PDF_ANNOT_LINK, PDF_ANNOT_POPUP, PDF_ANNOT_WIDGET)
         if not hasattr(types, "__getitem__"):
-            annot_xrefs = [a[0] for a in self.annot_xrefs() if a[1] not in skip_types]
+            annot_xrefs = [a[0] for a in self.annot_xrefs() if a[1] not in _ANNOT_SKIP_TYPES]
         else:
-            annot_xrefs = [a[0] for a in self.annot_xrefs() if a[1] in types and a[1] not in skip_types]
+            types = frozenset(types) - _ANNOT_SKIP_TYPES
+            annot_xrefs = [a[0] for a in self.annot_xrefs() if a[1] in types]
+        load_annot = self.load_annot
         for xref in annot_xrefs:
-            annot = self.load_annot(xref)
+            annot = load_annot(xref)
             annot._yielded=True
             yield annot
 
     @property
     def artbox(self):
         """The ArtBox"""
-        rect = self._other_box("ArtBox")
-        if rect == None:
-            return self.cropbox
-        mb = self.mediabox
-        return Rect(rect[0], mb.y1 - rect[3], rect[2], mb.y1 - rect[1])
+        return self._other_box_rect("ArtBox")
 
     @property
     def bleedbox(self):
         """The BleedBox"""
-        rect = self._other_box("BleedBox")
-        if rect == None:
-            return self.cropbox
-        mb = self.mediabox
-        return Rect(rect[0], mb.y1 - rect[3], rect[2], mb.y1 - rect[1])
+        return self._other_box_rect("BleedBox")
 
     def bound(self):
         """Get page rectangle."""
@@ -8027,7 +8193,7 @@ class Page:
     def clean_contents(self, sanitize=1):
         if not sanitize and not self.is_wrapped:
             self.wrap_contents()
-        page = mupdf.pdf_page_from_fz_page( self.this)
+        page = self._pdf_page()
         if not page.m_internal:
             return
         filter_ = _make_PdfFilterOptions(recurse=1, instance_forms=1, ascii=0, sanitize=sanitize)
@@ -8089,23 +8255,24 @@ class Page:
             except:
                 exception_info()
                 pass
-            return val
 
-        page = mupdf.pdf_page_from_fz_page( self.this)
+        page = self._pdf_page()
         if not page.m_internal:
             return finished()   # have no PDF
         xref = linkdict[dictkey_xref]
         if xref < 1:
             return finished()   # invalid xref
-        annots = mupdf.pdf_dict_get( page.obj(), PDF_NAME('Annots'))
+        annots = mupdf.pdf_dict_get( page.obj(), _N_ANNOTS)
         if not annots.m_internal:
             return finished()   # have no annotations
         len_ = mupdf.pdf_array_len( annots)
         if len_ == 0:
             return finished()
         oxref = 0
+        to_num = mupdf.pdf_to_num
+        array_get = mupdf.pdf_array_get
         for i in range( len_):
-            oxref = mupdf.pdf_to_num( mupdf.pdf_array_get( annots, i))
+            oxref = to_num( array_get( annots, i))
             if xref == oxref:
                 break   # found xref in annotations
 
@@ -8113,7 +8280,7 @@ class Page:
             return finished()   # xref not in annotations
         mupdf.pdf_array_delete( annots, i) # delete entry in annotations
         mupdf.pdf_delete_object( page.doc(), xref) # delete link object
-        mupdf.pdf_dict_put( page.obj(), PDF_NAME('Annots'), annots)
+        mupdf.pdf_dict_put( page.obj(), _N_ANNOTS, annots)
         JM_refresh_links( page)
 
         return finished()
@@ -8184,47 +8351,38 @@ class Page:
 
     def get_bboxlog(self, layers=None):
         CheckParent(self)
-        old_rotation = self.rotation
-        if old_rotation != 0:
-            self.set_rotation(0)
         page = self.this
         rc = []
         inc_layers = True if layers else False
-        dev = JM_new_bbox_device( rc, inc_layers)
-        mupdf.fz_run_page( page, dev, mupdf.FzMatrix(), mupdf.FzCookie())
-        mupdf.fz_close_device( dev)
-
-        if old_rotation != 0:
-            self.set_rotation(old_rotation)
+        with self._zero_rotation():
+            dev = JM_new_bbox_device( rc, inc_layers)
+            mupdf.fz_run_page( page, dev, _FZ_IDENTITY, mupdf.FzCookie())
+            mupdf.fz_close_device( dev)
         return rc
 
     def get_cdrawings(self, extended=None, callback=None, method=None):
         """Extract vector graphics ("line art") from the page."""
         CheckParent(self)
-        old_rotation = self.rotation
-        if old_rotation != 0:
-            self.set_rotation(0)
         page = self.this
         if isinstance(page, mupdf.PdfPage):
             # Downcast pdf_page to fz_page.
             page = mupdf.FzPage(page)
         assert isinstance(page, mupdf.FzPage), f'self.this={self.this}'
         clips = True if extended else False
-        prect = mupdf.fz_bound_page(page)
-        if g_use_extra:
-            rc = extra.get_cdrawings(page, extended, callback, method)
-        else:
-            rc = list()
-            if callable(callback) or method is not None:
-                dev = JM_new_lineart_device_Device(callback, clips, method)
+        with self._zero_rotation():
+            prect = mupdf.fz_bound_page(page)
+            if g_use_extra:
+                rc = extra.get_cdrawings(page, extended, callback, method)
             else:
-                dev = JM_new_lineart_device_Device(rc, clips, method)
-            dev.ptm = mupdf.FzMatrix(1, 0, 0, -1, 0, prect.y1)
-            mupdf.fz_run_page(page, dev, mupdf.FzMatrix(), mupdf.FzCookie())
-            mupdf.fz_close_device(dev)
+                rc = list()
+                if callable(callback) or method is not None:
+                    dev = JM_new_lineart_device_Device(callback, clips, method)
+                else:
+                    dev = JM_new_lineart_device_Device(rc, clips, method)
+                dev.ptm = mupdf.FzMatrix(1, 0, 0, -1, 0, prect.y1)
+                mupdf.fz_run_page(page, dev, _FZ_IDENTITY, mupdf.FzCookie())
+                mupdf.fz_close_device(dev)
 
-        if old_rotation != 0:
-            self.set_rotation(old_rotation)
         if callable(callback) or method is not None:
             return
         return rc
@@ -8232,20 +8390,15 @@ class Page:
     def get_contents(self):
         """Get xrefs of /Contents objects."""
         CheckParent(self)
-        ret = []
-        page = self.this.pdf_page_from_fz_page()
-        obj = page.obj()
-        contents = obj.pdf_dict_get(mupdf.PDF_ENUM_NAME_Contents)
-        if contents.pdf_is_array():
-            n = contents.pdf_array_len()
-            for i in range(n):
-                icont = contents.pdf_array_get(i)
-                xref = icont.pdf_to_num()
-                ret.append(xref)
-        elif contents.m_internal:
-            xref = contents.pdf_to_num()
-            ret.append( xref)
-        return ret
+        page = self._pdf_page()
+        contents = mupdf.pdf_dict_get(page.obj(), _N_CONTENTS)
+        if mupdf.pdf_is_array(contents):
+            array_get = mupdf.pdf_array_get
+            to_num = mupdf.pdf_to_num
+            return [to_num(array_get(contents, i)) for i in range(mupdf.pdf_array_len(contents))]
+        if contents.m_internal:
+            return [mupdf.pdf_to_num(contents)]
+        return []
 
     def get_displaylist(self, annots=1):
         '''
@@ -8280,31 +8433,30 @@ class Page:
                 'fill_opacity',
                 'even_odd',
                 )
+        _Rect = Rect
+        _Quad = Quad
+        _Point = Point
+
+        def convert(item):
+            cmd = item[0]
+            if cmd == "re":
+                return ("re", _Rect(item[1]), item[2])
+            if cmd == "qu":
+                return ("qu", _Quad(item[1]))
+            return (cmd, *map(_Point, item[1:]))
+
         val = self.get_cdrawings(extended=extended)
-        for i in range(len(val)):
-            npath = val[i]
-            if not npath["type"].startswith("clip"):
-                npath["rect"] = Rect(npath["rect"])
+        for npath in val:
+            ptype = npath["type"]
+            if not ptype.startswith("clip"):
+                npath["rect"] = _Rect(npath["rect"])
             else:
-                npath["scissor"] = Rect(npath["scissor"])
-            if npath["type"]!="group":
-                items = npath["items"]
-                newitems = []
-                for item in items:
-                    cmd = item[0]
-                    rest = item[1:]
-                    if  cmd == "re":
-                        item = ("re", Rect(rest[0]), rest[1])
-                    elif cmd == "qu":
-                        item = ("qu", Quad(rest[0]))
-                    else:
-                        item = tuple([cmd] + [Point(i) for i in rest])
-                    newitems.append(item)
-                npath["items"] = newitems
-            if npath['type'] in ('f', 's'):
+                npath["scissor"] = _Rect(npath["scissor"])
+            if ptype != "group":
+                npath["items"] = [convert(item) for item in npath["items"]]
+            if ptype in ('f', 's'):
                 for k in allkeys:
-                    npath[k] = npath.get(k)
-            val[i] = npath
+                    npath.setdefault(k)
         return val
 
         class Drawpath(object):
@@ -8478,12 +8630,11 @@ class Page:
                 raise ValueError('need item of full page image list')
             item = name
         else:
-            imglist = [i for i in doc.get_page_images(self.number, True) if name == i[7]]
-            if len(imglist) == 1:
-                item = imglist[0]
-            elif imglist == []:
+            matches = (i for i in doc.get_page_images(self.number, True) if name == i[7])
+            item = next(matches, None)
+            if item is None:
                 raise ValueError('bad image name')
-            else:
+            if next(matches, None) is not None:
                 raise ValueError("found multiple images named '%s'." % name)
         xref = item[-1]
         if xref != 0 or transform == True:
@@ -8507,12 +8658,7 @@ class Page:
                 rc = bbox
                 break
 
-            hm = Matrix(util_hor_matrix(q.ll, q.lr))
-            h = abs(q.ll - q.ul)
-            w = abs(q.ur - q.ul)
-            m0 = Matrix(1 / w, 0, 0, 1 / h, 0, 0)
-            m = ~(hm * m0)
-            rc = (bbox, m)
+            rc = (bbox, ~Matrix(util_image_matrix(q)))
             break
         val = rc
 
@@ -8584,14 +8730,8 @@ class Page:
         CheckParent(self)
         if matrix is None:
             matrix = Matrix(1, 1)
-        old_rotation = self.rotation
-        if old_rotation != 0:
-            self.set_rotation(0)
-        try:
+        with self._zero_rotation():
             textpage = self._get_textpage(clip, flags=flags, matrix=matrix)
-        finally:
-            if old_rotation != 0:
-                self.set_rotation(old_rotation)
         textpage.parent = weakref.proxy(self)
         textpage = TextPage(textpage)
         return textpage
@@ -8599,21 +8739,15 @@ class Page:
     def get_texttrace(self):
 
         CheckParent(self)
-        old_rotation = self.rotation
-        if old_rotation != 0:
-            self.set_rotation(0)
         page = self.this
         rc = []
         if g_use_extra:
             dev = extra.JM_new_texttrace_device(rc)
         else:
             dev = JM_new_texttrace_device(rc)
-        prect = mupdf.fz_bound_page(page)
-        mupdf.fz_run_page(page, dev, mupdf.FzMatrix(), mupdf.FzCookie())
-        mupdf.fz_close_device(dev)
-
-        if old_rotation != 0:
-            self.set_rotation(old_rotation)
+        with self._zero_rotation():
+            mupdf.fz_run_page(page, dev, _FZ_IDENTITY, mupdf.FzCookie())
+            mupdf.fz_close_device(dev)
         return rc
 
     def get_xobjects(self):
@@ -8644,34 +8778,13 @@ class Page:
         # the font is not present for this page
         #--------------------------------------------------------------------------
 
-        bfname = Base14_fontdict.get(fontname.lower(), None) # BaseFont if Base-14 font
+        lname = fontname.lower()
+        bfname = Base14_fontdict.get(lname, None) # BaseFont if Base-14 font
 
-        serif = 0
-        CJK_number = -1
-        CJK_list_n = ["china-t", "china-s", "japan", "korea"]
-        CJK_list_s = ["china-ts", "china-ss", "japan-s", "korea-s"]
+        CJK_number, serif = _CJK_FONTS.get(fontname, (-1, 0))
 
-        try:
-            CJK_number = CJK_list_n.index(fontname)
-            serif = 0
-        except Exception:
-            # Verbose in PyMuPDF/tests.
-            #exception_info()
-            pass
-
-        if CJK_number < 0:
-            try:
-                CJK_number = CJK_list_s.index(fontname)
-                serif = 1
-            except Exception:
-                # Verbose in PyMuPDF/tests.
-                #exception_info()
-                pass
-
-        if fontname.lower() in fitz_fontdescriptors.keys():
-            import pymupdf_fonts
-            fontbuffer = pymupdf_fonts.myfont(fontname)  # make a copy
-            del pymupdf_fonts
+        if lname in fitz_fontdescriptors:
+            fontbuffer = _pymupdf_fonts.myfont(fontname)  # make a copy
 
         # install the font for the page
         if fontfile != None:
@@ -8706,11 +8819,16 @@ class Page:
         """Check if /Contents is wrapped with string pair "q" / "Q"."""
         if getattr(self, "was_wrapped", False):  # costly checks only once
             return True
-        cont = self.read_contents().split()
-        if cont == []:  # no contents treated as okay
+        # only the first and last token matter: avoid split() of everything
+        cont = JM_read_contents_ends(self._pdf_page().obj()).strip()
+        if not cont:  # no contents treated as okay
             self.was_wrapped = True
             return True
-        if cont[0] != b"q" or cont[-1] != b"Q":
+        if (cont[:1] != b"q" or cont[-1:] != b"Q"
+                or len(cont) == 1
+                or not cont[1:2].isspace()
+                or not cont[-2:-1].isspace()
+                ):
             return False  # potential "geometry" issue
         self.was_wrapped = True  # cheap check next time
         return True
@@ -8718,10 +8836,10 @@ class Page:
     @property
     def language(self):
         """Page language."""
-        pdfpage = mupdf.pdf_page_from_fz_page(self.this)
+        pdfpage = self._pdf_page()
         if not pdfpage.m_internal:
             return
-        lang = mupdf.pdf_dict_get_inheritable(pdfpage.obj(), PDF_NAME('Lang'))
+        lang = mupdf.pdf_dict_get_inheritable(pdfpage.obj(), _N_LANG)
         if not lang.m_internal:
             return
         return mupdf.pdf_to_str_buf(lang)
@@ -8775,12 +8893,9 @@ class Page:
         val.xref = 0
         val.id = ""
         if self.parent.is_pdf:
-            xrefs = self.annot_xrefs()
-            xrefs = [x for x in xrefs if x[1] == mupdf.PDF_ANNOT_LINK]
-            if xrefs:
-                link_id = xrefs[0]
-                val.xref = link_id[0]
-                val.id = link_id[2]
+            link_id = JM_first_link_xref(self._pdf_page().obj())
+            if link_id:
+                val.xref, val.id = link_id
         else:
             val.xref = 0
             val.id = ""
@@ -8793,7 +8908,7 @@ class Page:
         """Load a widget by its xref."""
         CheckParent(self)
 
-        page = mupdf.pdf_page_from_fz_page( self.this)
+        page = self._pdf_page()
         ASSERT_PDF(page);
         annot = JM_get_widget_by_xref( page, xref)
         #log( '{=type(annot)}')
@@ -8821,7 +8936,8 @@ class Page:
 
     @property
     def mediabox_size(self):
-        return Point(self.mediabox.x1, self.mediabox.y1)
+        mb = self.mediabox
+        return Point(mb.x1, mb.y1)
 
     @property
     def parent( self):
@@ -8845,7 +8961,7 @@ class Page:
     def rotation(self):
         """Page rotation."""
         CheckParent(self)
-        page = self.this if isinstance(self.this, mupdf.PdfPage) else self.this.pdf_page_from_fz_page()
+        page = self._pdf_page()
         if not page:
             return 0
         return JM_page_rotation(page);
@@ -8892,17 +9008,12 @@ class Page:
     def set_language(self, language=None):
         """Set PDF page default language."""
         CheckParent(self)
-        pdfpage = mupdf.pdf_page_from_fz_page(self.this)
+        pdfpage = self._pdf_page()
         ASSERT_PDF(pdfpage)
         if not language:
-            pdf_dict_del(pdfpage.obj(), PDF_NAME('Lang'))
+            mupdf.pdf_dict_del(pdfpage.obj(), _N_LANG)
         else:
-            lang = mupdf.fz_text_language_from_string(language)
-            mupdf.pdf_dict_put_text_string(
-                    pdfpage.obj,
-                    PDF_NAME(Lang),
-                    mupdf.fz_string_from_text_language(buf, lang)  # fixme: needs wrapper to handle char buf[8].
-                    )
+            mupdf.pdf_dict_put_text_string(pdfpage.obj(), _N_LANG, language)
 
     def set_mediabox(self, rect):
         """Set the MediaBox."""
@@ -8914,19 +9025,19 @@ class Page:
                 or mupdf.fz_is_infinite_rect(mediabox)
                 ):
             raise ValueError( MSG_BAD_RECT)
-        mupdf.pdf_dict_put_rect( page.obj(), PDF_NAME('MediaBox'), mediabox)
-        mupdf.pdf_dict_del( page.obj(), PDF_NAME('CropBox'))
-        mupdf.pdf_dict_del( page.obj(), PDF_NAME('ArtBox'))
-        mupdf.pdf_dict_del( page.obj(), PDF_NAME('BleedBox'))
-        mupdf.pdf_dict_del( page.obj(), PDF_NAME('TrimBox'))
+        mupdf.pdf_dict_put_rect( page.obj(), _N_MEDIABOX, mediabox)
+        mupdf.pdf_dict_del( page.obj(), _N_CROPBOX)
+        mupdf.pdf_dict_del( page.obj(), _N_ARTBOX)
+        mupdf.pdf_dict_del( page.obj(), _N_BLEEDBOX)
+        mupdf.pdf_dict_del( page.obj(), _N_TRIMBOX)
 
     def set_rotation(self, rotation):
         """Set page rotation."""
         CheckParent(self)
-        page = mupdf.pdf_page_from_fz_page( self.this)
+        page = self._pdf_page()
         ASSERT_PDF(page)
         rot = JM_norm_rotation(rotation)
-        mupdf.pdf_dict_put_int( page.obj(), PDF_NAME('Rotate'), rot)
+        mupdf.pdf_dict_put_int( page.obj(), _N_ROTATE, rot)
 
     def set_trimbox(self, rect):
         """Set the TrimBox."""
@@ -8954,11 +9065,7 @@ class Page:
     @property
     def trimbox(self):
         """The TrimBox"""
-        rect = self._other_box("TrimBox")
-        if rect == None:
-            return self.cropbox
-        mb = self.mediabox
-        return Rect(rect[0], mb.y1 - rect[3], rect[2], mb.y1 - rect[1])
+        return self._other_box_rect("TrimBox")
 
     def widgets(self, types=None):
         """ Generator over the widgets of a page.
@@ -8968,14 +9075,13 @@ class Page:
                     all fields are returned. E.g. types=[PDF_WIDGET_TYPE_TEXT]
                     will only yield text fields.
         """
-        for a in self.annot_xrefs():
-            log( '{a=}')
-        widget_xrefs = [a[0] for a in self.annot_xrefs() if a[1] == PDF_ANNOT_WIDGET]
-        #log(f'widgets(): {widget_xrefs=}')
-        for xref in widget_xrefs:
-            widget = self.load_widget(xref)
-            if types == None or widget.field_type in types:
-                yield (widget)
+        load_widget = self.load_widget
+        for xref, annot_type, _ in self.annot_xrefs():
+            if annot_type != PDF_ANNOT_WIDGET:
+                continue
+            widget = load_widget(xref)
+            if types is None or widget.field_type in types:
+                yield widget
 
     def wrap_contents(self):
         if self.is_wrapped:  # avoid unnecessary wrapping
@@ -8993,6 +9099,39 @@ class Page:
     rect = property(bound, doc="page rectangle")
 
 
+# struct.Struct unpacking the n bytes of a pixel, indexed by n; used by
+# Pixmap.pixel(). Pixels have at most 32 colorants plus alpha.
+_PIXEL_STRUCTS = tuple(struct.Struct('%dB' % n) for n in range(34))
+
+# Output format codes of Pixmap.tobytes() and Pixmap.save().
+_PIXMAP_TOBYTES_FORMATS = {
+        "png": 1,
+        "pnm": 2,
+        "pgm": 2,
+        "ppm": 2,
+        "pbm": 2,
+        "pam": 3,
+        "tga": 4,
+        "tpic": 4,
+        "psd": 5,
+        "ps": 6,
+        'jpg': 7,
+        'jpeg': 7,
+        }
+_PIXMAP_SAVE_FORMATS = {
+        "png": 1,
+        "pnm": 2,
+        "pgm": 2,
+        "ppm": 2,
+        "pbm": 2,
+        "pam": 3,
+        "psd": 5,
+        "ps": 6,
+        "jpg": 7,
+        "jpeg": 7,
+        }
+
+
 class Pixmap:
 
     def __init__(self, *args):
@@ -9103,12 +9242,12 @@ class Pixmap:
             pm.m_internal.yres = src_pix.m_internal.yres
 
             # copy samples data ------------------------------------------
-            if 1:
+            if hasattr(mupdf, 'll_fz_pixmap_copy'):
                 # We use specially-provided mupdfpy_pixmap_copy() to get best
                 # performance.
                 # test_pixmap.py:test_setalpha(): 3.9s t=0.0062
                 mupdf.ll_fz_pixmap_copy( pm.m_internal, src_pix.m_internal, n)
-            elif 1:
+            else:
                 # Use memoryview.
                 # test_pixmap.py:test_setalpha(): 4.6 t=0.51
                 src_view = mupdf.fz_pixmap_samples_memoryview( src_pix)
@@ -9118,47 +9257,23 @@ class Pixmap:
                     size = w * h * (n + alpha)
                     pm_view[ 0 : size] = src_view[ 0 : size]
                 else:
-                    tptr = 0
-                    sptr = 0
-                    # This is a little faster than calling
-                    # pm.fz_samples_set(), but still quite slow. E.g. reduces
-                    # test_pixmap.py:test_setalpha() from 6.7s to 4.5s.
-                    #
-                    # t=0.53
+                    # Copy each colorant of a row as one strided slice,
+                    # instead of each pixel separately.
                     pm_stride = pm.stride()
                     pm_n = pm.n()
                     pm_alpha = pm.alpha()
                     src_stride = src_pix.stride()
                     src_n = src_pix.n()
-                    #log( '{=pm_stride pm_n src_stride src_n}')
+                    pm_row = pm_n * w
+                    src_row = src_n * w
+                    opaque = b"\xff" * w
                     for y in range( h):
-                        for x in range( w):
-                            pm_i = pm_stride * y + pm_n * x
-                            src_i = src_stride * y + src_n * x
-                            pm_view[ pm_i : pm_i + n] = src_view[ src_i : src_i + n]
-                            if pm_alpha:
-                                pm_view[ pm_i + n] = 255
-            else:
-                # Copy individual bytes from Python. Very slow.
-                # test_pixmap.py:test_setalpha(): 6.89 t=2.601
-                if src_pix.alpha() == pm.alpha():   # identical samples
-                    #memcpy(tptr, sptr, w * h * (n + alpha));
-                    for i in range(w * h * (n + alpha)):
-                        pm.fz_samples_set(i, src_pix.fz_samples_get(i))
-                else:
-                    # t=2.56
-                    tptr = 0
-                    sptr = 0
-                    src_pix_alpha = src_pix.alpha()
-                    for i in range(w * h):
-                        #memcpy(tptr, sptr, n);
-                        for j in range(n):
-                            pm.fz_samples_set(tptr + j, src_pix.fz_samples_get(sptr + j))
-                        tptr += n
-                        if pm.alpha():
-                            pm.fz_samples_set(tptr, 255)
-                            tptr += 1
-                        sptr += n + src_pix_alpha
+                        pm_i = pm_stride * y
+                        src_i = src_stride * y
+                        for j in range( n):
+                            pm_view[ pm_i + j : pm_i + pm_row : pm_n] = src_view[ src_i + j : src_i + src_row : src_n]
+                        if pm_alpha:
+                            pm_view[ pm_i + n : pm_i + pm_row : pm_n] = opaque
             self.this = pm
 
         elif args_match(args, (mupdf.FzColorspace, fitz.Colorspace), int, int, None, (int, bool)):
@@ -9321,18 +9436,14 @@ class Pixmap:
         """Return most frequent color and its usage ratio."""
         # As of 2022-09-02, PyObject *color_topusage(PyObject *clip=NULL) {...}
         # is commented-out in PyMuPDF/fitz/fitz.i,
-        allpixels = 0
-        cnt = 0
         if clip != None and self.irect in Rect(clip):
             clip = self.irect
-        for pixel, count in self.color_count(colors=True,clip=clip).items():
-            allpixels += count
-            if count > cnt:
-                cnt = count
-                maxpixel = pixel
+        counts = self.color_count(colors=True,clip=clip)
+        allpixels = sum(counts.values())
         if not allpixels:
             return (1, bytes([255] * self.n))
-        return (cnt / allpixels, maxpixel)
+        maxpixel = max(counts, key=counts.get)  # first of equally frequent
+        return (counts[maxpixel] / allpixels, maxpixel)
 
     @property
     def colorspace(self):
@@ -9398,10 +9509,16 @@ class Pixmap:
         pm = self.this
         n = pm.n()
         count = pm.w() * pm.h() * n
-        sample0 = _pixmap_read_samples( pm, 0, n)
-        for offset in range( n, count, n):
-            sample = _pixmap_read_samples( pm, offset, n)
-            if sample != sample0:
+        if not count:
+            return True
+        mv = self.samples_mv
+        # Compare blocks of pixels against a repeated first pixel, stopping
+        # at the first difference.
+        block = bytes( mv[ 0 : n]) * 65536
+        step = len( block)
+        for offset in range( 0, count, step):
+            end = min( offset + step, count)
+            if mv[ offset : end] != block[ 0 : end - offset]:
                 return False
         return True
 
@@ -9465,7 +9582,16 @@ class Pixmap:
         else:
             mode = "CMYK"
 
-        img = Image.frombytes(mode, (self.width, self.height), self.samples)
+        # Pillow decodes straight from the samples buffer into its own
+        # storage, so no intermediate bytes copy is needed.
+        img = Image.frombytes(
+                mode,
+                (self.width, self.height),
+                self.samples_mv,
+                "raw",
+                mode,
+                self.stride,
+                )
 
         if "dpi" not in kwargs.keys():
             kwargs["dpi"] = (self.xres, self.yres)
@@ -9486,18 +9612,17 @@ class Pixmap:
     def pixel(self, x, y):
         """Get color tuple of pixel (x, y).
         Last item is the alpha if Pixmap.alpha is true."""
+        pm = self.this.m_internal
         if (0
                 or x < 0
-                or x >= self.this.m_internal.w
+                or x >= pm.w
                 or y < 0
-                or y >= self.this.m_internal.h
+                or y >= pm.h
                 ):
             RAISEPY(MSG_PIXEL_OUTSIDE, PyExc_ValueError)
-        n = self.this.m_internal.n
-        stride = self.this.m_internal.stride
-        i = stride * y + n * x
-        ret = tuple( self.samples_mv[ i: i+n])
-        return ret
+        n = pm.n
+        i = pm.stride * y + n * x
+        return _PIXEL_STRUCTS[n].unpack_from( self.samples_mv, i)
 
     @property
     def samples(self)->bytes:
@@ -9522,19 +9647,6 @@ class Pixmap:
             output: (str) only use to overrule filename extension. Default is PNG.
                     Others are JPEG, JPG, PNM, PGM, PPM, PBM, PAM, PSD, PS.
         """
-        valid_formats = {
-                "png": 1,
-                "pnm": 2,
-                "pgm": 2,
-                "ppm": 2,
-                "pbm": 2,
-                "pam": 3,
-                "psd": 5,
-                "ps": 6,
-                "jpg": 7,
-                "jpeg": 7,
-                }
-        
         if type(filename) is str:
             pass
         elif hasattr(filename, "absolute"):
@@ -9545,9 +9657,9 @@ class Pixmap:
             _, ext = os.path.splitext(filename)
             output = ext[1:]
 
-        idx = valid_formats.get(output.lower(), None)
+        idx = _PIXMAP_SAVE_FORMATS.get(output.lower(), None)
         if idx == None:
-            raise ValueError(f"Image format {output} not in {tuple(valid_formats.keys())}")
+            raise ValueError(f"Image format {output} not in {tuple(_PIXMAP_SAVE_FORMATS.keys())}")
         if self.alpha and idx in (2, 6, 7):
             raise ValueError("'%s' cannot have alpha" % output)
         if self.colorspace and self.colorspace.n > 3 and idx in (1, 2, 4):
@@ -9603,8 +9715,7 @@ class Pixmap:
                 assert 0, f'unexpected type for alphavalues: {type(alphavalues)}'
             if data_len < w * h:
                 raise ValueError( "bad alpha values");
-        if 1:
-            #import mupdf2
+        if hasattr(mupdf, 'Pixmap_set_alpha_helper'):
             # Use C implementation for speed.
             mupdf.Pixmap_set_alpha_helper(
                     balen,
@@ -9619,62 +9730,45 @@ class Pixmap:
                     bgcolor,
                     )
         else:
-            i = k = j = 0
-            data_fix = 255
-            while i < balen:
-                alpha = data[k]
-                if zero_out:
-                    for j in range(i, i+n):
-                        if pix.fz_samples_get(j) != colors[j - i]:
-                            data_fix = 255
-                            break
-                        else:
-                            data_fix = 0
-                if data_len:
-                    def fz_mul255( a, b):
-                        x = a * b + 128
-                        x += x // 256
-                        return x // 256
-
-                    if data_fix == 0:
-                        pix.fz_samples_set(i+n, 0)
+            # Same as Pixmap_set_alpha_helper(), working on the samples
+            # memoryview instead of calling fz_samples_get/set() per byte.
+            samples = self.samples_mv
+            stride = n + 1
+            if not data_len and not zero_out:
+                samples[ n : balen : stride] = b"\xff" * (w * h)
+            elif data_len and not zero_out and not premultiply and not bground:
+                samples[ n : balen : stride] = data[ : w * h]
+            else:
+                colors = colors[ : n]
+                bgcolor = [c & 255 for c in bgcolor[ : n]]
+                data_fix = 255
+                k = 0
+                for i in range( 0, balen, stride):
+                    if zero_out:
+                        data_fix = 0 if samples[ i : i + n].tolist() == colors else 255
+                    if data_len:
+                        alpha = data[ k]
+                        samples[ i + n] = 0 if data_fix == 0 else alpha
+                        if premultiply and not bground:
+                            for j in range( i, i + n):
+                                x = samples[ j] * alpha + 128
+                                samples[ j] = (x + (x >> 8)) >> 8
+                        elif bground:
+                            for j in range( i, i + n):
+                                m = bgcolor[ j - i]
+                                x = (samples[ j] - m) * alpha + 128
+                                samples[ j] = (m + ((x + (x >> 8)) >> 8)) & 255
                     else:
-                        pix.fz_samples_set(i+n, alpha)
-                    if premultiply and not bground:
-                        denom = int(data[k])
-                        for j in range(i, i+n):
-                            pix.fz_samples_set(j, fz_mul255( pix.fz_samples_get(j), alpha))
-                    elif bground:
-                        for j in range( i, i+n):
-                            m = bgcolor[j - i]
-                            pix.fz_samples_set(j, fz_mul255( pix.fz_samples_get(j) - m, alpha))
-                else:
-                    pixsamples_set(i+n, data_fix)
-                i += n+1
-                k += 1
-
+                        samples[ i + n] = data_fix
+                    k += 1
 
     def tobytes(self, output="png", jpg_quality=95):
         '''
         Convert to binary image stream of desired type.
         '''
-        valid_formats = {
-                "png": 1,
-                "pnm": 2,
-                "pgm": 2,
-                "ppm": 2,
-                "pbm": 2,
-                "pam": 3,
-                "tga": 4,
-                "tpic": 4,
-                "psd": 5,
-                "ps": 6,
-                'jpg': 7,
-                'jpeg': 7,
-                }
-        idx = valid_formats.get(output.lower(), None)
+        idx = _PIXMAP_TOBYTES_FORMATS.get(output.lower(), None)
         if idx==None:
-            raise ValueError(f"Image format {output} not in {tuple(valid_formats.keys())}")
+            raise ValueError(f"Image format {output} not in {tuple(_PIXMAP_TOBYTES_FORMATS.keys())}")
         if self.alpha and idx in (2, 6, 7):
             raise ValueError("'{output}' cannot have alpha")
         if self.colorspace and self.colorspace.n > 3 and idx in (1, 2, 4):
@@ -12013,7 +12107,7 @@ class TextWriter:
 
     @property
     def _bbox(self):
-        val = JM_py_from_rect( mupdf.fz_bound_text( self.this, mupdf.FzStrokeState(None), mupdf.FzMatrix()))
+        val = JM_py_from_rect( mupdf.fz_bound_text( self.this, mupdf.FzStrokeState(None), _FZ_IDENTITY))
         val = Rect(val)
         return val
 
@@ -12163,12 +12257,12 @@ class TextWriter:
             ASSERT_PDF(pdfpage)
             resources = mupdf.pdf_new_dict(pdfpage.doc(), 5)
             contents = mupdf.fz_new_buffer(1024)
-            dev = mupdf.pdf_new_pdf_device( pdfpage.doc(), mupdf.FzMatrix(), resources, contents)
+            dev = mupdf.pdf_new_pdf_device( pdfpage.doc(), _FZ_IDENTITY, resources, contents)
             #log( '=== {dev_color!r=}')
             mupdf.fz_fill_text(
                     dev,
                     self.this,
-                    mupdf.FzMatrix(),
+                    _FZ_IDENTITY,
                     colorspace,
                     dev_color,
                     alpha,
@@ -12764,6 +12858,8 @@ dictkey_yres = "yres"
 
 
 try:
+    # Keep a reference to the module for Font() and Page.insert_font().
+    import pymupdf_fonts as _pymupdf_fonts
     from pymupdf_fonts import fontdescriptors, fontbuffers
 
     fitz_fontdescriptors = fontdescriptors.copy()
@@ -12771,6 +12867,7 @@ try:
         fitz_fontdescriptors[k]["loader"] = fontbuffers[k]
     del fontdescriptors, fontbuffers
 except ImportError:
+    _pymupdf_fonts = None
     fitz_fontdescriptors = {}
 
 symbol_glyphs = (   # Glyph list for the built-in font 'Symbol'
@@ -13317,7 +13414,7 @@ def _remove_dest_range(pdf, numbers):
             continue
 
         pageref = mupdf.pdf_lookup_page_obj( pdf, i)
-        annots = mupdf.pdf_dict_get( pageref, PDF_NAME('Annots'))
+        annots = mupdf.pdf_dict_get( pageref, _N_ANNOTS)
         if not annots.m_internal:
             continue
         len_ = mupdf.pdf_array_len(annots)
@@ -13344,12 +13441,6 @@ def _remove_dest_range(pdf, numbers):
                 mupdf.pdf_array_delete( annots, j)
 
 
-def ASSERT_PDF(cond):
-    assert isinstance(cond, (mupdf.PdfPage, mupdf.PdfDocument)), f'type(cond)={type(cond)} cond={cond}'
-    if not cond.m_internal:
-        raise Exception('not a PDF')
-
-
 def DUMMY(*args, **kw):
     return
 
@@ -13392,6 +13483,23 @@ def JM_BinFromBuffer(buffer_):
     return ret
 
 
+# Initial state copied by JM_image_digest(); copying is cheaper than setting
+# up a new hash object, which may involve an OpenSSL algorithm lookup.
+_image_digest_init = hashlib.sha1()
+
+def JM_image_digest(*chunks):
+    '''
+    Digest of the image data in `chunks`, used by Page._insert_image() to
+    find images already inserted into the document. It only has to tell
+    images apart, so we use SHA-1, which hashlib usually runs with hardware
+    support, rather than MuPDF's MD5.
+    '''
+    h = _image_digest_init.copy()
+    for chunk in chunks:
+        h.update(chunk)
+    return h.digest()
+
+
 def JM_EscapeStrFromStr(c):
     # `c` is typically from SWIG which will have converted a `const char*` from
     # C into a Python `str` using `PyUnicode_DecodeUTF8(carray, static_cast<
@@ -14097,7 +14205,7 @@ def JM_convert_to_pdf(doc, fp, tp, rotate):
         page = mupdf.fz_load_page(doc, i)
         mediabox = mupdf.fz_bound_page(page)
         dev, resources, contents = mupdf.pdf_page_write(pdfout, mediabox);
-        mupdf.fz_run_page(page, dev, mupdf.FzMatrix(), mupdf.FzCookie());
+        mupdf.fz_run_page(page, dev, _FZ_IDENTITY, mupdf.FzCookie());
         mupdf.fz_close_device(dev)
         dev = None
         page_obj = mupdf.pdf_add_page(pdfout, mediabox, rot, resources, contents)
@@ -14187,7 +14295,7 @@ def JM_cropbox(page_obj):
     
     mediabox = JM_mediabox(page_obj)
     cropbox = mupdf.pdf_to_rect(
-                mupdf.pdf_dict_get_inheritable(page_obj, PDF_NAME('CropBox'))
+                mupdf.pdf_dict_get_inheritable(page_obj, _N_CROPBOX)
                 )
     if mupdf.fz_is_infinite_rect(cropbox) or mupdf.fz_is_empty_rect(cropbox):
         cropbox = mediabox
@@ -14206,6 +14314,22 @@ def JM_derotate_page_matrix(page):
     return mupdf.fz_invert_matrix(mp)
 
 
+def JM_dict_merge(dst, src):
+    '''
+    Copy all key/value pairs of PDF dict `src` into PDF dict `dst`.
+    '''
+    if g_use_extra:
+        return extra.JM_dict_merge(dst, src)
+
+    n = mupdf.pdf_dict_len(src)
+    for i in range(n):
+        mupdf.pdf_dict_put(
+                dst,
+                mupdf.pdf_dict_get_key(src, i),
+                mupdf.pdf_dict_get_val(src, i),
+                )
+
+
 def JM_delete_annot(page, annot):
     '''
     delete an annotation using mupdf functions, but first delete the /AP
@@ -14219,7 +14343,7 @@ def JM_delete_annot(page, annot):
     # next delete the /Popup and /AP entries from annot dictionary
     mupdf.pdf_dict_del(annot.pdf_annot_obj(), PDF_NAME('AP'))
 
-    annots = mupdf.pdf_dict_get(page.obj(), PDF_NAME('Annots'))
+    annots = mupdf.pdf_dict_get(page.obj(), _N_ANNOTS)
     assert annots.m_internal
     n = mupdf.pdf_array_len(annots)
     for i in range(n - 1, -1, -1):
@@ -14637,9 +14761,9 @@ def JM_get_annot_id_list(page):
     annots = page.obj().pdf_dict_get( mupdf.PDF_ENUM_NAME_Annots)
     if not annots.m_internal:
         return names
+    array_get = annots.pdf_array_get
     for i in range( annots.pdf_array_len()):
-        annot_obj =annots.pdf_array_get(i)
-        name = annot_obj.pdf_dict_gets("NM")
+        name = array_get(i).pdf_dict_gets("NM")
         if name.m_internal:
             names.append(
                 name.pdf_to_text_string()
@@ -14655,7 +14779,7 @@ def JM_get_annot_xref_list( page_obj):
         return names
     
     names = []
-    annots = mupdf.pdf_dict_get( page_obj, PDF_NAME('Annots'))
+    annots = mupdf.pdf_dict_get( page_obj, _N_ANNOTS)
     n = mupdf.pdf_array_len( annots)
     for i in range( n):
         annot_obj = mupdf.pdf_array_get( annots, i)
@@ -14671,6 +14795,24 @@ def JM_get_annot_xref_list( page_obj):
     return names
 
 
+def JM_first_link_xref( page_obj):
+    '''
+    return (xref, /NM id) of the first link annot of a page, or None
+    '''
+    if g_use_extra:
+        return extra.JM_first_link_xref( page_obj)
+
+    annots = mupdf.pdf_dict_get( page_obj, _N_ANNOTS)
+    n = mupdf.pdf_array_len( annots)
+    for i in range( n):
+        annot_obj = mupdf.pdf_array_get( annots, i)
+        subtype = mupdf.pdf_dict_get( annot_obj, _N_SUBTYPE)
+        if not mupdf.pdf_name_eq( subtype, _N_LINK):
+            continue
+        id_ = mupdf.pdf_dict_gets( annot_obj, "NM")
+        return mupdf.pdf_to_num( annot_obj), mupdf.pdf_to_text_string( id_)
+
+
 def JM_get_border_style(style):
     '''
     return pdf_obj "border style" from Python str
@@ -14825,6 +14967,33 @@ def JM_get_resource_properties(ref):
     return rc
 
 
+def JM_resource_property_name(ref, xref):
+    '''
+    Look up `xref` in Resources/Properties of `ref`. Return (name, True) if
+    it is registered, else (first unused name "MC<n>", False).
+    '''
+    if g_use_extra:
+        name, found = extra.JM_resource_property_name(ref, xref)
+        return name, bool(found)
+    # Same as extra.JM_resource_property_name(): the last name registered
+    # for `xref` wins, and every registered name counts as used, also those
+    # of other entries for the same xref.
+    found = None
+    used = set()
+    for p, x in JM_get_resource_properties(ref):
+        if x == xref:
+            found = p
+        used.add(p)
+    if found is not None:
+        return found, True
+    i = 0
+    mc = "MC%i" % i
+    while mc in used:
+        i += 1
+        mc = "MC%i" % i
+    return mc, False
+
+
 def JM_get_widget_by_xref( page, xref):
     '''
     retrieve widget by its xref
@@ -15292,7 +15461,7 @@ def JM_insert_contents(pdf, pageref, newcont, overlay):
     3. Else, create new array and put old content obj and this object into it.
        If the page had no /Contents before, just create a 1-item array.
     '''
-    contents = mupdf.pdf_dict_get(pageref, PDF_NAME('Contents'))
+    contents = mupdf.pdf_dict_get(pageref, _N_CONTENTS)
     newconts = mupdf.pdf_add_stream(pdf, newcont, mupdf.PdfObj(), 0)
     xref = mupdf.pdf_to_num(newconts)
     if mupdf.pdf_is_array(contents):
@@ -15310,7 +15479,7 @@ def JM_insert_contents(pdf, pageref, newcont, overlay):
             mupdf.pdf_array_push(carr, newconts)
             if contents.m_internal:
                 mupdf.pdf_array_push(carr, contents)
-        mupdf.pdf_dict_put(pageref, PDF_NAME('Contents'), carr)
+        mupdf.pdf_dict_put(pageref, _N_CONTENTS, carr)
     return xref
 
 
@@ -15705,22 +15874,18 @@ def JM_mediabox(page_obj):
     '''
     return a PDF page's MediaBox
     '''
-    page_mediabox = mupdf.FzRect(mupdf.FzRect.Fixed_UNIT)
+    if g_use_extra:
+        return extra.JM_mediabox(page_obj)
+
     mediabox = mupdf.pdf_to_rect(
-            mupdf.pdf_dict_get_inheritable(page_obj, PDF_NAME('MediaBox'))
+            mupdf.pdf_dict_get_inheritable(page_obj, _N_MEDIABOX)
             );
     if mupdf.fz_is_empty_rect(mediabox) or mupdf.fz_is_infinite_rect(mediabox):
-        mediabox.x0 = 0
-        mediabox.y0 = 0
-        mediabox.x1 = 612
-        mediabox.y1 = 792
-
-    page_mediabox = mupdf.FzRect(
-            mupdf.fz_min(mediabox.x0, mediabox.x1),
-            mupdf.fz_min(mediabox.y0, mediabox.y1),
-            mupdf.fz_max(mediabox.x0, mediabox.x1),
-            mupdf.fz_max(mediabox.y0, mediabox.y1),
-            )
+        x0, y0, x1, y1 = 0, 0, 612, 792
+    else:
+        x0, y0, x1, y1 = mediabox.x0, mediabox.y0, mediabox.x1, mediabox.y1
+
+    page_mediabox = mupdf.FzRect(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
 
     if (page_mediabox.x1 - page_mediabox.x0 < 1
             or page_mediabox.y1 - page_mediabox.y0 < 1
@@ -16005,7 +16170,7 @@ def JM_pixmap_from_display_list(
         mupdf.fz_run_display_list(list_, dev, fz_identity, rclip, None)
     else:
         dev = mupdf.fz_new_draw_device(matrix, pix)
-        mupdf.fz_run_display_list(list_, dev, mupdf.FzMatrix(), mupdf.FzRect(mupdf.FzRect.Fixed_INFINITE), mupdf.FzCookie())
+        mupdf.fz_run_display_list(list_, dev, _FZ_IDENTITY, mupdf.FzRect(mupdf.FzRect.Fixed_INFINITE), mupdf.FzCookie())
 
     mupdf.fz_close_device(dev)
     # Use special raw Pixmap constructor so we don't set alpha to true.
@@ -16192,16 +16357,55 @@ def JM_read_contents(pageref):
     assert isinstance(pageref, mupdf.PdfObj), f'{type(pageref)}'
     contents = pageref.pdf_dict_get(mupdf.PDF_ENUM_NAME_Contents)
     if contents.pdf_is_array():
+        n = contents.pdf_array_len()
+        if n == 1:
+            # no need to copy into a second buffer
+            return contents.pdf_array_get(0).pdf_load_stream()
+        # fz_append_buffer() grows `res` geometrically, so this is linear in
+        # the total size.
         res = mupdf.FzBuffer(1024)
-        for i in range(contents.pdf_array_len()):
+        for i in range(n):
             obj = contents.pdf_array_get(i)
             nres = obj.pdf_load_stream()
             res.fz_append_buffer(nres)
     elif contents.m_internal:
         res = contents.pdf_load_stream()
+    else:
+        res = mupdf.FzBuffer(0)
     return res
 
 
+def JM_read_contents_ends(pageref):
+    '''
+    Like JM_read_contents(), but returns bytes that only agree with the
+    page's concatenated /Contents in their first and last two non-space
+    bytes. Streams of a /Contents array between those needed for this are
+    not loaded.
+    '''
+    contents = pageref.pdf_dict_get(mupdf.PDF_ENUM_NAME_Contents)
+    if not contents.pdf_is_array():
+        if not contents.m_internal:
+            return b""
+        return JM_BinFromBuffer(contents.pdf_load_stream())
+    n = contents.pdf_array_len()
+
+    def load(i):
+        return JM_BinFromBuffer(contents.pdf_array_get(i).pdf_load_stream())
+
+    # Streams [0, first) give the head, streams [last, n) the tail.
+    head = b""
+    first = 0
+    while first < n and len(head.lstrip()) < 2:
+        head += load(first)
+        first += 1
+    tail = b""
+    last = n
+    while last > first and len(tail.rstrip()) < 2:
+        last -= 1
+        tail = load(last) + tail
+    return head + tail
+
+
 def JM_rect_from_py(r):
     if isinstance(r, mupdf.FzRect):
         return r
@@ -16238,7 +16442,7 @@ def JM_refresh_links( page):
     '''
     if not page:
         return
-    obj = mupdf.pdf_dict_get( page.obj(), PDF_NAME('Annots'))
+    obj = mupdf.pdf_dict_get( page.obj(), _N_ANNOTS)
     if obj.m_internal:
         pdf = page.doc()
         number = mupdf.pdf_lookup_page_number( pdf, page.obj())
@@ -16776,6 +16980,25 @@ def JM_update_stream(doc, obj, buffer_, compress):
         doc.pdf_update_stream(obj, buffer_, 0);
 
 
+def JM_is_shown_xobject(pdf, xobj2_xref, xref):
+    '''
+    Check that `xobj2_xref` still is a Form XObject made by
+    Page._show_pdf_page() for the page XObject `xref`.
+    '''
+    if not _INRANGE(xobj2_xref, 1, mupdf.pdf_xref_len(pdf) - 1):
+        return False
+    xobj2 = mupdf.pdf_new_indirect(pdf, xobj2_xref, 0)
+    if not mupdf.pdf_is_stream(xobj2):
+        return False
+    if not mupdf.pdf_name_eq(mupdf.pdf_dict_get(xobj2, _N_SUBTYPE), _N_FORM):
+        return False
+    xobj1 = mupdf.pdf_dict_gets(
+            mupdf.pdf_dict_getl(xobj2, _N_RESOURCES, _N_XOBJECT),
+            "fullpage",
+            )
+    return mupdf.pdf_to_num(xobj1) == xref
+
+
 def JM_xobject_from_page(pdfout, fsrcpage, xref, gmap):
     '''
     Make an XObject from a PDF page
@@ -16787,7 +17010,7 @@ def JM_xobject_from_page(pdfout, fsrcpage, xref, gmap):
     else:
         srcpage = mupdf.pdf_page_from_fz_page(fsrcpage.this)
         spageref = srcpage.obj()
-        mediabox = mupdf.pdf_to_rect(mupdf.pdf_dict_get_inheritable(spageref, PDF_NAME('MediaBox')))
+        mediabox = mupdf.pdf_to_rect(mupdf.pdf_dict_get_inheritable(spageref, _N_MEDIABOX))
         # Deep-copy resources object of source page
         o = mupdf.pdf_dict_get_inheritable(spageref, PDF_NAME('Resources'))
         if gmap.m_internal:
@@ -16802,7 +17025,7 @@ def JM_xobject_from_page(pdfout, fsrcpage, xref, gmap):
         #-------------------------------------------------------------
         # create XObject representing the source page
         #-------------------------------------------------------------
-        xobj1 = mupdf.pdf_new_xobject(pdfout, mediabox, mupdf.FzMatrix(), mupdf.PdfObj(0), res)
+        xobj1 = mupdf.pdf_new_xobject(pdfout, mediabox, _FZ_IDENTITY, mupdf.PdfObj(0), res)
         # store spage contents
         JM_update_stream(pdfout, xobj1, res, 1)
 
@@ -16982,10 +17205,10 @@ def Page__add_text_marker(self, quads, annot_type):
     rotation = JM_page_rotation(pdfpage)
     def final():
         if rotation != 0:
-            mupdf.pdf_dict_put_int(pdfpage.obj(), PDF_NAME('Rotate'), rotation)
+            mupdf.pdf_dict_put_int(pdfpage.obj(), _N_ROTATE, rotation)
     try:
         if rotation != 0:
-            mupdf.pdf_dict_put_int(pdfpage.obj(), PDF_NAME('Rotate'), 0)
+            mupdf.pdf_dict_put_int(pdfpage.obj(), _N_ROTATE, 0)
         annot = mupdf.pdf_create_annot(pdfpage, annot_type)
         len_ = len(quads)
         for item in quads:
@@ -17006,6 +17229,59 @@ def PDF_NAME(x):
     return getattr(mupdf, f'PDF_ENUM_NAME_{x}')
 
 
+# Names used when creating annotations, resolved once.
+_N_ROTATE = PDF_NAME('Rotate')
+_N_Q = PDF_NAME('Q')
+_N_IC = PDF_NAME('IC')
+_N_FS = PDF_NAME('FS')
+_N_CONTENTS = PDF_NAME('Contents')
+_N_INKLIST = PDF_NAME('InkList')
+_N_ANNOTS = PDF_NAME('Annots')
+_N_LINK = PDF_NAME('Link')
+_N_NAME = PDF_NAME('Name')
+_N_RESOURCES = PDF_NAME('Resources')
+_N_FONT = PDF_NAME('Font')
+_N_DA = PDF_NAME('DA')
+
+# Names of page dictionary entries.
+_N_LANG = PDF_NAME('Lang')
+_N_MEDIABOX = PDF_NAME('MediaBox')
+_N_CROPBOX = PDF_NAME('CropBox')
+_N_ARTBOX = PDF_NAME('ArtBox')
+_N_BLEEDBOX = PDF_NAME('BleedBox')
+_N_TRIMBOX = PDF_NAME('TrimBox')
+
+# Names used when placing images, pages and graphics states.
+_N_XOBJECT = PDF_NAME('XObject')
+_N_SUBTYPE = PDF_NAME('Subtype')
+_N_FORM = PDF_NAME('Form')
+_N_WIDTH = PDF_NAME('Width')
+_N_HEIGHT = PDF_NAME('Height')
+_N_W = PDF_NAME('W')
+_N_H = PDF_NAME('H')
+_N_EXTGSTATE = PDF_NAME('ExtGState')
+_N_CA = PDF_NAME('CA')
+_N_ca = PDF_NAME('ca')
+
+# Stamp names in the order of the `stamp` argument of Page.add_stamp_annot().
+_STAMP_NAMES = (
+        PDF_NAME('Approved'),
+        PDF_NAME('AsIs'),
+        PDF_NAME('Confidential'),
+        PDF_NAME('Departmental'),
+        PDF_NAME('Experimental'),
+        PDF_NAME('Expired'),
+        PDF_NAME('Final'),
+        PDF_NAME('ForComment'),
+        PDF_NAME('ForPublicRelease'),
+        PDF_NAME('NotApproved'),
+        PDF_NAME('NotForPublicRelease'),
+        PDF_NAME('Sold'),
+        PDF_NAME('TopSecret'),
+        PDF_NAME('Draft'),
+        )
+
+
 def UpdateFontInfo(doc: "struct Document *", info: typing.Sequence):
     xref = info[0]
     found = False
@@ -19519,6 +19795,32 @@ def util_hor_matrix(C, P):
     return JM_py_from_matrix(mupdf.fz_concat(m1, m2))
 
 
+def util_image_matrix(q):
+    '''
+    Return the matrix that maps quad `q` of an image to the unit rectangle,
+    i.e. util_hor_matrix(q.ll, q.lr) scaled by the inverse side lengths of q.
+    Computed with plain floats instead of Point / Matrix operators.
+    '''
+    ll, ul, ur, lr = q.ll, q.ul, q.ur, q.lr
+    llx, lly = ll.x, ll.y
+    ulx, uly = ul.x, ul.y
+    urx, ury = ur.x, ur.y
+    lrx, lry = lr.x, lr.y
+    # (cosine, sine) of vector lr-ll, like fz_normalize_vector()
+    cs, sn = lrx - llx, lry - lly
+    length = math.hypot(cs, sn)
+    if length:
+        cs /= length
+        sn /= length
+    h = math.hypot(llx - ulx, lly - uly)
+    w = math.hypot(urx - ulx, ury - uly)
+    return (
+            cs / w, -sn / h,
+            sn / w, cs / h,
+            (-llx * cs - lly * sn) / w, (llx * sn - lly * cs) / h,
+            )
+
+
 def match_string(h0, n0):
     h = 0
     n = 0
@@ -19587,14 +19889,14 @@ def page_merge(doc_des, doc_src, page_from, page_to, rotate, links, copy_annots,
     
     # list of object types (per page) we want to copy
     known_page_objs = [
-        PDF_NAME('Contents'),
+        _N_CONTENTS,
         PDF_NAME('Resources'),
-        PDF_NAME('MediaBox'),
-        PDF_NAME('CropBox'),
-        PDF_NAME('BleedBox'),
-        PDF_NAME('TrimBox'),
-        PDF_NAME('ArtBox'),
-        PDF_NAME('Rotate'),
+        _N_MEDIABOX,
+        _N_CROPBOX,
+        _N_BLEEDBOX,
+        _N_TRIMBOX,
+        _N_ARTBOX,
+        _N_ROTATE,
         PDF_NAME('UserUnit'),
         ]
     page_ref = mupdf.pdf_lookup_page_obj(doc_src, page_from)
@@ -19613,10 +19915,10 @@ def page_merge(doc_des, doc_src, page_from, page_to, rotate, links, copy_annots,
     # Copy the annotations, but skip types Link, Popup, IRT.
     # Remove dict keys P (parent) and Popup from copied annot.
     if copy_annots:
-        old_annots = mupdf.pdf_dict_get( page_ref, PDF_NAME('Annots'))
+        old_annots = mupdf.pdf_dict_get( page_ref, _N_ANNOTS)
         if old_annots.m_internal:
             n = mupdf.pdf_array_len( old_annots)
-            new_annots = mupdf.pdf_dict_put_array( page_dict, PDF_NAME('Annots'), n)
+            new_annots = mupdf.pdf_dict_put_array( page_dict, _N_ANNOTS, n)
             for i in range(n):
                 o = mupdf.pdf_array_get( old_annots, i)
                 if mupdf.pdf_dict_gets( o, "IRT").m_internal:
@@ -19637,7 +19939,7 @@ def page_merge(doc_des, doc_src, page_from, page_to, rotate, links, copy_annots,
 
     # rotate the page
     if rotate != -1:
-        mupdf.pdf_dict_put_int( page_dict, PDF_NAME('Rotate'), rotate)
+        mupdf.pdf_dict_put_int( page_dict, _N_ROTATE, rotate)
     # Now add the page dictionary to dest PDF
     ref = mupdf.pdf_add_object( doc_des, page_dict)
 
@@ -19759,7 +20061,7 @@ def pdf_lookup_page_loc_imp(doc, node, skip, parentp, indexp):
                 else:
                     a = (
                             mupdf.pdf_dict_get( kid, PDF_NAME('Kids')).m_internal
-                            and not mupdf.pdf_dict_get( kid, PDF_NAME('MediaBox')).m_internal
+                            and not mupdf.pdf_dict_get( kid, _N_MEDIABOX).m_internal
                             )
                 if a:
                     count = mupdf.pdf_dict_get_int( kid, PDF_NAME('Count'))
@@ -19772,7 +20074,7 @@ def pdf_lookup_page_loc_imp(doc, node, skip, parentp, indexp):
                     if type_.m_internal:
                         a = not mupdf.pdf_name_eq( type_, PDF_NAME('Page'))
                     else:
-                        a = not mupdf.pdf_dict_get( kid, PDF_NAME('MediaBox')).m_internal
+                        a = not mupdf.pdf_dict_get( kid, _N_MEDIABOX).m_internal
                     if a:
                         mupdf.fz_warn( f"non-page object in page tree ({mupdf.pdf_to_name( type_)})")
                     if skip[0] == 0:
@@ -19987,7 +20289,7 @@ def retainpages(doc, liste):
     # Edit each pages /Annot list to remove any links pointing to nowhere.
     for i in range(pagecount):
         pageref = mupdf.pdf_lookup_page_obj(doc, i)
-        annots = mupdf.pdf_dict_get(pageref, PDF_NAME('Annots'))
+        annots = mupdf.pdf_dict_get(pageref, _N_ANNOTS)
         len_ = mupdf.pdf_array_len(annots)
         j = 0
         while 1:
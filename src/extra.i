@@ -1012,7 +1012,7 @@ static int JM_page_rotation(mupdf::PdfPage& page)
 //----------------------------------------------------------------------------
 // return a PDF page's MediaBox
 //----------------------------------------------------------------------------
-static mupdf::FzRect JM_mediabox(mupdf::PdfObj& page_obj)
+mupdf::FzRect JM_mediabox(mupdf::PdfObj& page_obj)
 {
     mupdf::FzRect mediabox = mupdf::pdf_to_rect(
             mupdf::pdf_dict_get_inheritable(page_obj, PDF_NAME(MediaBox))
@@ -1183,6 +1183,27 @@ static PyObject* JM_get_annot_xref_list2(mupdf::FzPage& page)
     return JM_get_annot_xref_list2(pdf_page);
 }
 
+//------------------------------------------------------------------------
+// return (xref, /NM id) of a page's first link annot, or None
+//------------------------------------------------------------------------
+static PyObject* JM_first_link_xref(const mupdf::PdfObj& page_obj)
+{
+    pdf_obj* annots = mupdf::ll_pdf_dict_get(page_obj.m_internal, PDF_NAME(Annots));
+    int n = mupdf::ll_pdf_array_len(annots);
+    for (int i = 0; i < n; i++)
+    {
+        pdf_obj* annot_obj = mupdf::ll_pdf_array_get(annots, i);
+        pdf_obj* subtype = mupdf::ll_pdf_dict_get(annot_obj, PDF_NAME(Subtype));
+        if (!mupdf::ll_pdf_name_eq(subtype, PDF_NAME(Link)))
+        {
+            continue;
+        }
+        pdf_obj* id = mupdf::ll_pdf_dict_gets(annot_obj, "NM");
+        return Py_BuildValue("is", mupdf::ll_pdf_to_num(annot_obj), mupdf::ll_pdf_to_text_string(id));
+    }
+    Py_RETURN_NONE;
+}
+
 static mupdf::FzBuffer JM_object_to_buffer(const mupdf::PdfObj& what, int compress, int ascii)
 {
     mupdf::FzBuffer res = mupdf::fz_new_buffer(512);
@@ -1232,6 +1253,74 @@ static PyObject* xref_object(mupdf::FzDocument& document, int xref, int compress
     return xref_object(pdf, xref, compressed, ascii);
 }
 
+//-----------------------------------------------------------------------------
+// Document.xref_xml_metadata(): xref of /Root/Metadata, 0 if none, -1 if the
+// PDF has no /Root.
+//-----------------------------------------------------------------------------
+static int xref_xml_metadata(mupdf::PdfDocument& pdf)
+{
+    pdf_obj* root = mupdf::ll_pdf_dict_get(mupdf::ll_pdf_trailer(pdf.m_internal), PDF_NAME(Root));
+    if (!root)
+    {
+        return -1;
+    }
+    pdf_obj* xml = mupdf::ll_pdf_dict_get(root, PDF_NAME(Metadata));
+    if (!xml)
+    {
+        return 0;
+    }
+    return mupdf::ll_pdf_to_num(xml);
+}
+
+
+//-----------------------------------------------------------------------------
+// Page._get_optional_content(): look up `xref` in /Resources/Properties of
+// `ref` in one pass. Returns (name, 1) if it is registered, else (first unused
+// "MC<n>" name, 0).
+//-----------------------------------------------------------------------------
+static PyObject* JM_resource_property_name(mupdf::PdfObj& ref, int xref)
+{
+    pdf_obj* properties = nullptr;
+    pdf_obj* resources = mupdf::ll_pdf_dict_get(ref.m_internal, PDF_NAME(Resources));
+    if (resources)
+    {
+        properties = mupdf::ll_pdf_dict_get(resources, PDF_NAME(Properties));
+    }
+    int n = (properties) ? mupdf::ll_pdf_dict_len(properties) : 0;
+    const char* found = nullptr;
+    std::vector<char> used(n + 1, 0);
+    for (int i = 0; i < n; i++)
+    {
+        const char* name = mupdf::ll_pdf_to_name(mupdf::ll_pdf_dict_get_key(properties, i));
+        if (mupdf::ll_pdf_to_num(mupdf::ll_pdf_dict_get_val(properties, i)) == xref)
+        {
+            found = name;   // like a dict built from the items: last one wins
+        }
+        // mark "MC<n>" names, n in canonical decimal form
+        if (name[0] != 'M' || name[1] != 'C' || !name[2]) continue;
+        if (name[2] == '0' && name[3]) continue;
+        long v = 0;
+        const char* d = name + 2;
+        for (; *d >= '0' && *d <= '9' && v <= n; d++)
+        {
+            v = v * 10 + (*d - '0');
+        }
+        if (!*d && v <= n)
+        {
+            used[v] = 1;
+        }
+    }
+    if (found)
+    {
+        return Py_BuildValue("si", found, 1);
+    }
+    int i = 0;
+    while (used[i]) i++;
+    char mc[32];
+    snprintf(mc, sizeof(mc), "MC%i", i);
+    return Py_BuildValue("si", mc, 0);
+}
+
 
 //-----------------------------------------------------------------------------
 // perform some cleaning if we have /EmbeddedFiles:
@@ -1278,6 +1367,24 @@ static void JM_ensure_identity(mupdf::PdfDocument& pdf)
     }
 }
 
+//------------------------------------------------------------------------
+// Copy all key/value pairs of dict 'src' into dict 'dst'
+//------------------------------------------------------------------------
+static void JM_dict_merge(mupdf::PdfObj& dst, mupdf::PdfObj& src)
+{
+    pdf_obj* d = dst.m_internal;
+    pdf_obj* s = src.m_internal;
+    int n = mupdf::ll_pdf_dict_len(s);
+    for (int i = 0; i < n; ++i)
+    {
+        mupdf::ll_pdf_dict_put(
+                d,
+                mupdf::ll_pdf_dict_get_key(s, i),
+                mupdf::ll_pdf_dict_get_val(s, i)
+                );
+    }
+}
+
 
 // returns bio.tell() -> int
 static int64_t JM_bytesio_tell(fz_context* ctx, void* opaque)
@@ -1667,6 +1774,30 @@ static bool Outline_is_external(mupdf::FzOutline* outline)
     return mupdf::ll_fz_is_external_link(outline->m_internal->uri);
 }
 
+//-----------------------------------------------------------------------------
+// Returns (title, uri, page, x, y, is_open, is_external) of an outline item
+// in one call, or None if there is no underlying fz_outline.
+//-----------------------------------------------------------------------------
+static PyObject* Outline_info(mupdf::FzOutline* outline)
+{
+    fz_outline* ol = outline->m_internal;
+    if (!ol)
+    {
+        Py_RETURN_NONE;
+    }
+    bool is_external = (ol->uri) ? mupdf::ll_fz_is_external_link(ol->uri) : false;
+    return Py_BuildValue(
+            "(zziffiN)",
+            ol->title,
+            ol->uri,
+            ol->page.page,
+            ol->x,
+            ol->y,
+            (int) ol->is_open,
+            PyBool_FromLong((long) is_external)
+            );
+}
+
 static mupdf::FzDocument Document_init(
         const char* filename,
         PyObject* stream,
@@ -3060,6 +3191,68 @@ PyObject* get_cdrawings(mupdf::FzPage& page, PyObject *extended=NULL, PyObject *
 }
 
 
+//-----------------------------------------------------------------------------
+// Glyph advances (font size 1) for a C-contiguous buffer of uint32 unicodes,
+// e.g. an array('I'). Returns a list of floats.
+//-----------------------------------------------------------------------------
+static PyObject* Font_advances(
+        mupdf::FzFont& thisfont,
+        PyObject* unicodes,
+        int script,
+        int lang,
+        int wmode,
+        int small_caps
+        )
+{
+    Py_buffer view;
+    if (PyObject_GetBuffer(unicodes, &view, PyBUF_C_CONTIGUOUS) != 0)
+    {
+        PyErr_Clear();
+        throw std::runtime_error("unicodes must be a contiguous buffer");
+    }
+    if (view.itemsize != 4)
+    {
+        PyBuffer_Release(&view);
+        throw std::runtime_error("unicodes must have 4-byte items");
+    }
+    const uint32_t* cps = (const uint32_t*) view.buf;
+    Py_ssize_t n = view.len / 4;
+    fz_font* font0 = thisfont.m_internal;
+    PyObject* rc = PyList_New(n);
+    if (!rc)
+    {
+        PyErr_Clear();
+        PyBuffer_Release(&view);
+        throw std::runtime_error("cannot create list of advances");
+    }
+    try
+    {
+        for (Py_ssize_t i = 0; i < n; ++i)
+        {
+            fz_font* font = font0;
+            int gid;
+            if (small_caps)
+            {
+                gid = mupdf::ll_fz_encode_character_sc(font0, (int) cps[i]);
+            }
+            else
+            {
+                gid = mupdf::ll_fz_encode_character_with_fallback(font0, (int) cps[i], script, lang, &font);
+            }
+            PyList_SET_ITEM(rc, i, PyFloat_FromDouble(mupdf::ll_fz_advance_glyph(font, gid, wmode)));
+        }
+    }
+    catch (...)
+    {
+        Py_DECREF(rc);
+        PyBuffer_Release(&view);
+        throw;
+    }
+    PyBuffer_Release(&view);
+    return rc;
+}
+
+
 %}
 
 /* Declarations for functions defined above. */
@@ -3121,6 +3314,7 @@ PyObject* Page_derotate_matrix(mupdf::FzPage& pdfpage);
 PyObject* JM_get_annot_xref_list(const mupdf::PdfObj& page_obj);
 PyObject* JM_get_annot_xref_list2(mupdf::PdfPage& page);
 PyObject* JM_get_annot_xref_list2(mupdf::FzPage& page);
+PyObject* JM_first_link_xref(const mupdf::PdfObj& page_obj);
 PyObject* xref_object(mupdf::PdfDocument& pdf, int xref, int compressed=0, int ascii=0);
 PyObject* xref_object(mupdf::FzDocument& document, int xref, int compressed=0, int ascii=0);
 
@@ -3180,6 +3374,7 @@ int page_count(mupdf::PdfDocument& pdf);
 PyObject* page_annot_xrefs(mupdf::PdfDocument& pdf, int pno);
 PyObject* page_annot_xrefs(mupdf::FzDocument& document, int pno);
 bool Outline_is_external(mupdf::FzOutline* outline);
+PyObject* Outline_info(mupdf::FzOutline* outline);
 void Document_extend_toc_items(mupdf::PdfDocument& pdf, PyObject* items);
 void Document_extend_toc_items(mupdf::FzDocument& document, PyObject* items);
 
@@ -3203,5 +3398,18 @@ static fz_quad JM_char_quad( fz_stext_line *line, fz_stext_char *ch);
 void JM_print_stext_page_as_text(mupdf::FzOutput& out, mupdf::FzStextPage& page);
 
 void set_small_glyph_heights(int on);
+mupdf::FzRect JM_mediabox(mupdf::PdfObj& page_obj);
 mupdf::FzRect JM_cropbox(mupdf::PdfObj& page_obj);
 PyObject* get_cdrawings(mupdf::FzPage& page, PyObject *extended=NULL, PyObject *callback=NULL, PyObject *method=NULL);
+
+void JM_dict_merge(mupdf::PdfObj& dst, mupdf::PdfObj& src);
+PyObject* Font_advances(
+        mupdf::FzFont& thisfont,
+        PyObject* unicodes,
+        int script,
+        int lang,
+        int wmode,
+        int small_caps
+        );
+int xref_xml_metadata(mupdf::PdfDocument& pdf);
+PyObject* JM_resource_property_name(mupdf::PdfObj& ref, int xref);
@@ -1689,9 +1689,9 @@ def delete_widget(page: fitz.Page, widget: fitz.Widget) -> fitz.Widget:
     page.delete_annot(annot)
     widget._annot.__del__()
     widget._annot.parent = None
-    keylist = list(widget.__dict__.keys())
-    for key in keylist:
-        del widget.__dict__[key]
+    for key in fitz.Widget.__slots__:
+        if key != "__weakref__" and hasattr(widget, key):
+            delattr(widget, key)
     return nextwidget
 
 
@@ -22,4 +22,22 @@ def test_font2():
     """Old and new length computation must be the same."""
     font = fitz.Font("helv")
     text = "PyMuPDF"
-    assert font.text_length(text) == fitz.get_text_length(text)
\ No newline at end of file
+    assert font.text_length(text) == fitz.get_text_length(text)
+
+
+def test_small_caps():
+    """Fonts without small-caps glyphs use the normal glyphs."""
+    font = fitz.Font("helv")
+    gid = font.has_glyph(ord("a"))
+    assert gid
+    assert font.has_glyph(ord("a"), small_caps=1) == gid
+    bbox = font.glyph_bbox(ord("a"))
+    assert not bbox.is_empty
+    assert font.glyph_bbox(ord("a"), small_caps=1) == bbox
+
+
+def test_flags_copy():
+    font = fitz.Font("helv")
+    flags = font.flags
+    flags["mono"] = 99
+    assert font.flags["mono"] != 99
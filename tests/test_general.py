@@ -62,6 +62,24 @@ def test_wrapcontents():
     page.clean_contents()
 
 
+def test_read_contents_missing():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 50), "Text")
+    assert page.read_contents()
+    doc.xref_set_key(page.xref, "Contents", "null")
+    assert page.read_contents() == b""
+
+
+def test_page_language():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.set_language("en-GB")
+    assert doc.xref_get_key(page.xref, "Lang") == ("string", "en-GB")
+    page.set_language(None)
+    assert doc.xref_get_key(page.xref, "Lang") == ("null", "null")
+
+
 def test_config():
     assert fitz.TOOLS.fitz_config["py-memory"] in (True, False)
 
@@ -177,6 +195,37 @@ def test_opacity():
     doc.save(outfile, expand=True, pretty=True)
     print("saved", outfile)
 
+def test_set_opacity():
+    doc = fitz.open()
+    page = doc.new_page()
+    assert page._set_opacity(CA=1, ca=1) is None
+    gstate = page._set_opacity(CA=0.5, ca=0.25)
+    assert gstate == "fitzca5025"
+    key = "Resources/ExtGState/" + gstate
+    assert doc.xref_get_key(page.xref, key)[0] == "dict"
+    assert float(doc.xref_get_key(page.xref, key + "/CA")[1]) == 0.5
+    assert float(doc.xref_get_key(page.xref, key + "/ca")[1]) == 0.25
+    # a second request re-uses the existing ExtGState
+    assert page._set_opacity(CA=0.5, ca=0.25) == gstate
+
+def test_delete_link():
+    doc = fitz.open()
+    page = doc.new_page()
+    for y in (100, 200):
+        page.insert_link(
+                {
+                    "kind": fitz.LINK_URI,
+                    "from": fitz.Rect(100, y, 200, y + 20),
+                    "uri": "https://mupdf.com/",
+                }
+                )
+    links = page.get_links()
+    assert len(links) == 2
+    page.delete_link(links[0])
+    links = page.get_links()
+    assert len(links) == 1
+    assert links[0]["from"] == fitz.Rect(100, 200, 200, 220)
+
 def test_get_text_dict():
     import json
     doc=fitz.open(f'{scriptdir}/resources/v110-changes.pdf')
@@ -158,6 +158,14 @@ def test_matrix():
     assert m[3] == m.d
     assert m[4] == m.e
     assert m[5] == m.f
+    assert m[-1] == m.f
+    assert m[1:3] == (m.b, m.c)
+    failed = False
+    try:
+        m[1.0]
+    except TypeError:
+        failed = True
+    assert failed
     m = fitz.Matrix()
     for i in range(6):
         m[i] = i + 1
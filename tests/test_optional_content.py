@@ -61,3 +61,18 @@ def test_oc2():
     assert set((ocg0, ocg1, ocg2, ocg3)) == set(tuple(doc.get_ocgs().keys()))
     doc.get_ocmd(ocmd0)
     page.get_oc_items()
+
+
+def test_oc_names(monkeypatch):
+    """The C++ and the Python lookup pick the same /MC names."""
+    for use_extra in (True, False):
+        monkeypatch.setattr(fitz, "g_use_extra", use_extra)
+        doc = fitz.open()
+        page = doc.new_page()
+        ocg1 = doc.add_ocg("ocg1")
+        ocg2 = doc.add_ocg("ocg2")
+        page._set_resource_property("MC0", ocg1)
+        page._set_resource_property("MC1", ocg1)
+        assert page._get_optional_content(ocg1) == "MC1"
+        assert page._get_optional_content(ocg2) == "MC2"
+        assert page._get_optional_content(ocg2) == "MC2"
@@ -8,6 +8,7 @@ import os
 import tempfile
 
 import fitz
+import pytest
 
 scriptdir = os.path.abspath(os.path.dirname(__file__))
 epub = os.path.join(scriptdir, "resources", "Bezier.epub")
@@ -89,10 +90,51 @@ def test_setalpha():
     t = bytearray([samples[i] for i in range(3, len(samples), 4)])
     assert t == alphas
 
+def test_setalpha_fallback(monkeypatch):
+    # the Python fallback of set_alpha() must give the same samples as the
+    # C helper
+    if not hasattr(fitz.mupdf, "Pixmap_set_alpha_helper"):
+        pytest.skip("no Pixmap_set_alpha_helper()")
+    w, h = 16, 8
+    samples = bytes((i * 37) % 256 for i in range(w * h * 4))
+    alphas = bytes((i * 11) % 256 for i in range(w * h))
+    opaque = tuple(samples[0:3])
+    matte = (10, 200, 30)
+
+    def set_alpha(**kwargs):
+        pix = fitz.Pixmap(fitz.csRGB, w, h, samples, True)
+        pix.set_alpha(**kwargs)
+        return pix.samples
+
+    cases = [
+            dict(),
+            dict(alphavalues=alphas, premultiply=0),
+            dict(alphavalues=alphas, premultiply=1),
+            dict(alphavalues=alphas, premultiply=0, matte=matte),
+            dict(alphavalues=alphas, premultiply=1, matte=matte),
+            dict(opaque=opaque),
+            dict(alphavalues=alphas, premultiply=0, opaque=opaque),
+            dict(alphavalues=alphas, premultiply=1, opaque=opaque),
+            dict(alphavalues=alphas, premultiply=1, opaque=opaque, matte=matte),
+            ]
+    expected = [set_alpha(**kwargs) for kwargs in cases]
+    monkeypatch.delattr(fitz.mupdf, "Pixmap_set_alpha_helper")
+    for kwargs, samples_c in zip(cases, expected):
+        assert set_alpha(**kwargs) == samples_c, kwargs
+
 def test_color_count():
     pm = fitz.Pixmap(imgfile)
     assert pm.color_count() == 40624
 
+def test_is_unicolor():
+    pm = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 10, 10), 0)
+    pm.clear_with(0x80)
+    assert pm.is_unicolor
+    pm.set_pixel(5, 5, (255, 0, 0))
+    assert not pm.is_unicolor
+    pm = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 0, 0), 0)
+    assert pm.is_unicolor
+
 def test_memoryview():
     pm = fitz.Pixmap(imgfile)
     samples = pm.samples_mv
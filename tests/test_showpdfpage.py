@@ -29,3 +29,23 @@ def test_insert():
     # Multiple computations may have lead to rounding deviations, so we need
     # some generosity here: enlarge rect by 1 point in each direction.
     assert img["bbox"] in rect + (-1, -1, 1, 1)
+
+
+def test_reuse_checked():
+    doc = fitz.open()
+    rect = fitz.Rect(50, 50, 100, 100)
+    src = fitz.open("pdf", fitz.open(imgfile).convert_to_pdf())
+    page = doc.new_page()
+    page.show_pdf_page(rect, src, 0)
+    assert len(doc.ShownXObjects) == 1
+    key, xobj2 = list(doc.ShownXObjects.items())[0]
+    # the same source page in the same place re-uses the XObject
+    page = doc.new_page()
+    page.show_pdf_page(rect, src, 0)
+    assert doc.ShownXObjects == {key: xobj2}
+    # a recorded XObject that was changed since is not re-used
+    doc.update_object(xobj2, "<<>>")
+    page = doc.new_page()
+    page.show_pdf_page(rect, src, 0)
+    assert doc.ShownXObjects[key] != xobj2
+    assert doc.ShownXObjects[key] in [x[0] for x in page.get_xobjects()]
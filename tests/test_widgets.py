@@ -158,6 +158,23 @@ def test_text2():
     assert field.field_type_string == "Text"
 
 
+def test_text_da_cmyk():
+    doc = fitz.open()
+    page = doc.new_page()
+    widget = fitz.Widget()
+    widget.field_name = "textfield-cmyk"
+    widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+    widget.rect = rect
+    widget.field_value = "CMYK text"
+    page.add_widget(widget)
+    xref = widget.xref
+    doc.xref_set_key(xref, "DA", "(/Helv 10 Tf 0 1 0.5 0 k)")
+    field = page.load_widget(xref)
+    assert field.text_font == "Helv"
+    assert field.text_fontsize == 10
+    assert field.text_color == [0, 1, 0.5, 0]
+
+
 # def test_deletewidget():
 #     pdf = fitz.open(filename)
 #     page = pdf[0]